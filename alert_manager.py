@@ -1,35 +1,271 @@
-import requests
 import json
 import os
+import time
+import threading
 import logging
-from PyQt5.QtWidgets import QMessageBox
+import numpy as np
+import transport
+from atomic_file import atomic_write_json, atomic_write_text
+from alert_rules import RuleEngine, build_columns, default_rules, format_rule_message
 
 # Enable debug logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+SENT_ALERTS_LOG = "sent_alerts.log"
+LEGACY_SENT_ALERTS_FILE = "sent_alerts.json"
+TELEGRAM_OUTBOX_FILE = "telegram_outbox.json"
+TELEGRAM_MAX_MESSAGE_LENGTH = 4000
+# Used when alert_settings has no miner_offline_minutes
+DEFAULT_MINER_OFFLINE_MINUTES = 10
+
+
+class AlertDedupIndex:
+    # Alert keys with their send time, kept in memory and persisted as an append-only log
+    def __init__(self, path=SENT_ALERTS_LOG, legacy_path=LEGACY_SENT_ALERTS_FILE, ttl=24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.entries = {}
+        self._log_lines = 0
+        self._replay()
+        self._import_legacy(legacy_path)
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    self._log_lines += 1
+                    if "key" in record:
+                        self.entries[record["key"]] = record.get("ts", 0)
+        except Exception as e:
+            logging.warning(f"Failed to load {self.path}: {e}")
+
+    def _import_legacy(self, legacy_path):
+        if not legacy_path or not os.path.exists(legacy_path):
+            return
+        try:
+            with open(legacy_path, "r") as f:
+                keys = json.load(f)
+            now = time.time()
+            for key in keys:
+                self.entries.setdefault(key, now)
+            self.compact()
+            os.replace(legacy_path, legacy_path + ".migrated")
+        except Exception as e:
+            logging.warning(f"Failed to import {legacy_path}: {e}")
+
+    def _append(self, record):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            self._log_lines += 1
+        except Exception as e:
+            logging.error(f"Failed to append to {self.path}: {e}")
+
+    def _expired(self, sent_at, now):
+        return bool(self.ttl) and now - sent_at >= self.ttl
+
+    def contains(self, key, now=None):
+        now = now if now is not None else time.time()
+        with self._lock:
+            sent_at = self.entries.get(key)
+            if sent_at is None:
+                return False
+            if self._expired(sent_at, now):
+                del self.entries[key]
+                return False
+            return True
+
+    def add(self, key, now=None):
+        with self._lock:
+            self.entries[key] = now if now is not None else time.time()
+            self._append({"key": key, "ts": self.entries[key]})
+            # Compact once the log has grown well past the live entry count
+            if self._log_lines > 2 * len(self.entries) + 100:
+                self._compact_locked()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self._compact_locked()
+
+    def compact(self):
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        now = time.time()
+        self.entries = {k: ts for k, ts in self.entries.items() if not self._expired(ts, now)}
+        try:
+            atomic_write_text(self.path, "".join(
+                json.dumps({"key": key, "ts": ts}) + "\n" for key, ts in self.entries.items()
+            ))
+            self._log_lines = len(self.entries)
+        except Exception as e:
+            logging.error(f"Failed to compact {self.path}: {e}")
+
+
+_dedup_indexes = {}
+_dedup_lock = threading.Lock()
+
+
+def get_dedup_index(path=SENT_ALERTS_LOG):
+    # All AlertManager instances share one index per log file
+    with _dedup_lock:
+        if path not in _dedup_indexes:
+            _dedup_indexes[path] = AlertDedupIndex(path)
+        return _dedup_indexes[path]
+
+
+def split_telegram_message(text, limit=TELEGRAM_MAX_MESSAGE_LENGTH):
+    parts = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            parts.append(current)
+            candidate = line
+        current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+class TelegramOutbox:
+    # Persistent outbound queue drained by a background sender thread
+    def __init__(self, path=TELEGRAM_OUTBOX_FILE):
+        self.path = path
+        self.alert_settings = {}
+        self._cond = threading.Condition()
+        self._not_before = 0
+        self.pending = self._load()
+        self._thread = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    return list(json.load(f))
+            except Exception as e:
+                logging.warning(f"Failed to load {self.path}: {e}")
+        return []
+
+    def _save_locked(self):
+        try:
+            atomic_write_json(self.path, self.pending)
+        except Exception as e:
+            logging.error(f"Failed to save {self.path}: {e}")
+
+    def enqueue(self, message):
+        with self._cond:
+            self.pending.extend(split_telegram_message(message))
+            self._save_locked()
+            self._cond.notify()
+
+    def wake(self):
+        # Settings changed: retry immediately instead of waiting out the current delay
+        with self._cond:
+            self._not_before = 0
+            self._cond.notify()
+
+    def _run(self):
+        backoff = 1
+        while True:
+            with self._cond:
+                while not self.pending or time.monotonic() < self._not_before:
+                    self._cond.wait(self._not_before - time.monotonic() if self.pending else None)
+                message = self.pending[0]
+
+            delay = self._deliver(message)
+            with self._cond:
+                if delay is None:
+                    backoff = 1
+                    if self.pending and self.pending[0] == message:
+                        self.pending.pop(0)
+                        self._save_locked()
+                    continue
+                if not delay:
+                    delay = backoff
+                    backoff = min(backoff * 2, 300)
+                self._not_before = time.monotonic() + delay
+
+    def _deliver(self, message):
+        # None once the message is done with; otherwise seconds to wait (0 = use backoff)
+        settings = self.alert_settings
+        bot_token = settings.get("bot_token", "").strip()
+        chat_id = settings.get("chat_id", "").strip()
+        if not settings.get("telegram_enabled", False) or not bot_token or not chat_id:
+            return 30  # keep undelivered messages until Telegram is configured again
+
+        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+        params = {'chat_id': chat_id, 'text': message}
+        try:
+            response = transport.get_session(url, idempotent=False).get(url, params=params, timeout=10)
+        except Exception as e:
+            logging.warning(f"Telegram send failed, will retry: {e}")
+            return 0
+
+        if response.status_code == 200:
+            logging.info(f"Telegram alert sent: {message}")
+            return None
+        if response.status_code == 429:
+            try:
+                retry_after = response.json().get("parameters", {}).get("retry_after", 5)
+            except ValueError:
+                retry_after = 5
+            logging.warning(f"Telegram rate limit hit, retrying in {retry_after}s")
+            return max(1, retry_after)
+        if response.status_code >= 500:
+            logging.warning(f"Telegram API error {response.status_code}, will retry")
+            return 0
+
+        logging.error(f"Telegram API error {response.status_code}: {response.text}; dropping message")
+        return None
+
+
+_outbox = None
+
+
+def get_outbox():
+    global _outbox
+    with _dedup_lock:
+        if _outbox is None:
+            _outbox = TelegramOutbox()
+        return _outbox
+
 
 class AlertManager:
     def __init__(self, config_manager):
         self.config_manager = config_manager
         self.alert_settings = config_manager.get_alert_settings()
 
-        self.sent_alerts_file = "sent_alerts.json"
         self.status_file = "miner_status.json"
 
-        self.persistent_alerts = self._load_json_set(self.sent_alerts_file)
+        self.sent_alerts = get_dedup_index()
+        self.sent_alerts.ttl = self._dedup_ttl()
         self.miner_status = self._load_json_dict(self.status_file)
+        self._status_dirty = False
 
-        self.status_changes = {}
         self.session_alerts_sent = set()
+        self.pending_alerts = []
+        self.rule_engine = RuleEngine(default_rules(self.alert_settings))
 
-    def _load_json_set(self, path):
-        if os.path.exists(path):
-            try:
-                with open(path, "r") as f:
-                    return set(json.load(f))
-            except Exception as e:
-                logging.warning(f"Failed to load {path}: {e}")
-        return set()
+        self.outbox = get_outbox()
+        self.outbox.alert_settings = self.alert_settings
+        self.outbox.wake()
 
     def _load_json_dict(self, path):
         if os.path.exists(path):
@@ -40,19 +276,28 @@ class AlertManager:
                 logging.warning(f"Failed to load {path}: {e}")
         return {}
 
-    def _save_json_set(self, path, data_set):
-        try:
-            with open(path, "w") as f:
-                json.dump(list(data_set), f)
-        except Exception as e:
-            logging.error(f"Failed to save {path}: {e}")
-
     def _save_json_dict(self, path, data_dict):
         try:
-            with open(path, "w") as f:
-                json.dump(data_dict, f)
+            atomic_write_json(path, data_dict)
+            return True
         except Exception as e:
             logging.error(f"Failed to save {path}: {e}")
+            return False
+
+    def flush_status(self):
+        # Status changes are marked dirty and written once per refresh cycle
+        if self._status_dirty and self._save_json_dict(self.status_file, dict(self.miner_status)):
+            self._status_dirty = False
+
+    def reload_settings(self):
+        self.alert_settings = self.config_manager.get_alert_settings()
+        self.rule_engine.rules = default_rules(self.alert_settings)
+        self.sent_alerts.ttl = self._dedup_ttl()
+        self.outbox.alert_settings = self.alert_settings
+        self.outbox.wake()
+
+    def _dedup_ttl(self):
+        return self.alert_settings.get("alert_dedup_hours", 24) * 3600
 
     def send_telegram_alert(self, message, skip_duplicate_check=False):
         if not self.alert_settings.get("telegram_enabled", False):
@@ -66,17 +311,15 @@ class AlertManager:
             logging.warning("Telegram bot token or chat ID is missing.")
             return False
 
-        if not skip_duplicate_check:
-            self.persistent_alerts = self._load_json_set(self.sent_alerts_file)
-            if message in self.persistent_alerts:
-                logging.info(f"Skipping duplicate alert: {message}")
-                return False
+        if not skip_duplicate_check and self.sent_alerts.contains(message):
+            logging.info(f"Skipping duplicate alert: {message}")
+            return False
 
         url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
         params = {'chat_id': chat_id, 'text': message}
 
         try:
-            response = requests.get(url, params=params, timeout=5)
+            response = transport.get_session(url, idempotent=False).get(url, params=params, timeout=5)
             logging.debug(f"Telegram response status: {response.status_code}")
             logging.debug(f"Telegram response text: {response.text}")
 
@@ -84,8 +327,7 @@ class AlertManager:
                 logging.info(f"Telegram alert sent: {message}")
                 self.session_alerts_sent.add(message)
                 if not skip_duplicate_check:
-                    self.persistent_alerts.add(message)
-                    self._save_json_set(self.sent_alerts_file, self.persistent_alerts)
+                    self.sent_alerts.add(message)
                 return True
             else:
                 logging.error(f"Telegram API error {response.status_code}: {response.text}")
@@ -94,6 +336,40 @@ class AlertManager:
             logging.exception(f"Exception sending Telegram alert: {e}")
             return False
 
+    def queue_alert(self, message):
+        # Alerts raised during a refresh are collected and sent as one digest by flush_alerts
+        if not self.alert_settings.get("telegram_enabled", False):
+            logging.info("Telegram alerts are disabled.")
+            return False
+
+        if not self.alert_settings.get("bot_token", "").strip() or not self.alert_settings.get("chat_id", "").strip():
+            logging.warning("Telegram bot token or chat ID is missing.")
+            return False
+
+        if self.sent_alerts.contains(message) or message in self.pending_alerts:
+            logging.info(f"Skipping duplicate alert: {message}")
+            return False
+
+        self.pending_alerts.append(message)
+        return True
+
+    def flush_alerts(self):
+        if not self.pending_alerts:
+            return None
+        alerts, self.pending_alerts = self.pending_alerts, []
+
+        if len(alerts) == 1:
+            digest = alerts[0]
+        else:
+            digest = f"⚠️ {len(alerts)} alerts\n" + "\n".join(alerts)
+        self.outbox.enqueue(digest)
+
+        # Queued messages survive restarts, so they count as sent for dedup purposes
+        for message in alerts:
+            self.sent_alerts.add(message)
+            self.session_alerts_sent.add(message)
+        return digest
+
     def _send_raw_telegram_message(self, message):
         if not self.alert_settings.get("telegram_enabled", False):
             logging.debug("Telegram disabled in settings.")
@@ -110,7 +386,7 @@ class AlertManager:
         params = {'chat_id': chat_id, 'text': message}
 
         try:
-            response = requests.get(url, params=params, timeout=5)
+            response = transport.get_session(url, idempotent=False).get(url, params=params, timeout=5)
             logging.debug(f"Raw Telegram response status: {response.status_code}")
             logging.debug(f"Raw Telegram response text: {response.text}")
             return response.status_code == 200
@@ -119,62 +395,57 @@ class AlertManager:
             return False
 
     def test_telegram(self, parent):
+        # Qt is only needed by the GUI; the headless daemon never calls this
+        from PyQt5.QtWidgets import QMessageBox
         success = self._send_raw_telegram_message("Test alert from ETH Miner Dashboard")
         if success:
             QMessageBox.information(parent, "Success", "Test message sent successfully!")
         else:
             QMessageBox.warning(parent, "Error", "Failed to send test message. Check your bot token, chat ID, or network connection.")
 
-    def check_miner_status(self, miner_id, is_offline, current_time):
-        current_status = "offline" if is_offline else "online"
-        previous_status = self.miner_status.get(miner_id)
-
-        logging.debug(f"Miner {miner_id[:6]}... current={current_status}, previous={previous_status}")
-
-        if previous_status is None:
-            self.miner_status[miner_id] = current_status
-            self._save_json_dict(self.status_file, self.miner_status)
-            return None
+    @staticmethod
+    def _status_alert_message(miner_id, is_offline):
+        if is_offline:
+            return f"🚨 Miner OFFLINE: {miner_id[:6]}...{miner_id[-4:]}"
+        return f"✅ Miner BACK ONLINE: {miner_id[:6]}...{miner_id[-4:]}"
 
-        if previous_status != current_status:
-            self.miner_status[miner_id] = current_status
-            self._save_json_dict(self.status_file, self.miner_status)
+    def offline_threshold_seconds(self):
+        return float(self.alert_settings.get("miner_offline_minutes", DEFAULT_MINER_OFFLINE_MINUTES)) * 60
 
-            if is_offline:
-                alert_msg = f"🚨 Miner OFFLINE: {miner_id[:6]}...{miner_id[-4:]}"
-            else:
-                alert_msg = f"✅ Miner BACK ONLINE: {miner_id[:6]}...{miner_id[-4:]}"
-            self.send_telegram_alert(alert_msg)
-            return alert_msg
+    def evaluate_fleet(self, miner_ids, stats, current_time, include_levels=True):
+        # Evaluates offline transitions and every configured rule over the whole snapshot
+        # at once; returns the per-miner offline flags
+        columns = build_columns(miner_ids, stats, current_time)
+        is_offline = columns["seconds_since_active"] > self.offline_threshold_seconds()
 
-        return None
+        status_codes = {"offline": 1.0, "online": 0.0}
+        previous = np.array([status_codes.get(self.miner_status.get(m), np.nan) for m in miner_ids])
+        unknown = np.isnan(previous)
+        changed = ~unknown & (previous != is_offline)
 
-    def check_balance_alerts(self, miner_id, eth_balance):
-        critical_threshold = self.alert_settings.get("critical_balance_alert", 0.1)
-        low_threshold = self.alert_settings.get("low_balance_alert", 0.5)
+        for i in np.flatnonzero(unknown | changed):
+            miner_id = miner_ids[i]
+            self.miner_status[miner_id] = "offline" if is_offline[i] else "online"
+            self._status_dirty = True
+            if changed[i]:
+                self.queue_alert(self._status_alert_message(miner_id, is_offline[i]))
 
-        msg_prefix = f"Miner {miner_id[:6]}..."
+        for rule, miner_id, value in self.rule_engine.evaluate(miner_ids, columns, include_levels):
+            self.queue_alert(format_rule_message(rule, miner_id, value))
 
-        if eth_balance < critical_threshold:
-            alert_msg = f"CRITICAL: {msg_prefix} balance {eth_balance} ETH"
-            self.send_telegram_alert(alert_msg)
-            return alert_msg
-
-        elif eth_balance < low_threshold:
-            alert_msg = f"WARNING: {msg_prefix} balance {eth_balance} ETH"
-            self.send_telegram_alert(alert_msg)
-            return alert_msg
-
-        return None
+        return is_offline
 
     def get_session_alerts(self):
         return list(self.session_alerts_sent)
 
-    def clear_all_alerts(self):
-        self.persistent_alerts.clear()
-        self._save_json_set(self.sent_alerts_file, self.persistent_alerts)
+    def clear_sent_alerts(self):
+        self.sent_alerts.clear()
         logging.info("All persistent alerts cleared.")
 
+    def clear_all_alerts(self):
+        self.clear_sent_alerts()
+
         self.miner_status.clear()
-        self._save_json_dict(self.status_file, self.miner_status)
+        self._status_dirty = True
+        self.flush_status()
         logging.info("Miner status history cleared.")
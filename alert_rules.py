@@ -0,0 +1,130 @@
+import math
+import numpy as np
+
+METRICS = ("precommit", "commit", "prepare", "create")
+COLUMNS = ["last_active_timestamp", "ping", "eth_balance", "cortensor_balance", "staked"] + \
+    [f"{m}_ratio" for m in METRICS]
+
+OPS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal
+}
+
+DEFAULT_RULE_MESSAGE = "{name}: Miner {prefix}... {field} {value}"
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return math.nan
+    return float(value)
+
+
+def build_columns(miner_ids, stats, current_time):
+    # One pass over the snapshot; every rule then works on these arrays
+    n = len(miner_ids)
+    columns = {name: np.full(n, np.nan) for name in COLUMNS}
+    for i, miner_id in enumerate(miner_ids):
+        data = stats.get(miner_id)
+        if not isinstance(data, dict):
+            continue
+        for name in ("last_active_timestamp", "ping", "eth_balance", "cortensor_balance", "staked"):
+            columns[name][i] = _number(data.get(name))
+        for metric in METRICS:
+            # Ratios are 0-1 fractions, the same unit as stats.json and the history API
+            m = data.get(metric)
+            if isinstance(m, dict) and "ratio" in m:
+                columns[f"{metric}_ratio"][i] = _number(m["ratio"])
+            elif isinstance(m, dict) and m.get("counter"):
+                columns[f"{metric}_ratio"][i] = _number(m.get("point", 0)) / m["counter"]
+
+    last_active = columns["last_active_timestamp"]
+    with np.errstate(invalid="ignore"):
+        known = ~np.isnan(last_active) & (last_active > 0)
+    columns["seconds_since_active"] = np.where(known, current_time - np.nan_to_num(last_active), np.inf)
+    return columns
+
+
+def default_rules(alert_settings):
+    rules = [
+        {
+            "name": "critical_balance", "field": "eth_balance", "op": "<",
+            "value": alert_settings.get("critical_balance_alert", 0.1), "group": "balance",
+            "message": "CRITICAL: Miner {prefix}... balance {value} ETH"
+        },
+        {
+            "name": "low_balance", "field": "eth_balance", "op": "<",
+            "value": alert_settings.get("low_balance_alert", 0.5), "group": "balance",
+            "message": "WARNING: Miner {prefix}... balance {value} ETH"
+        }
+    ]
+    # Extra rules from config. *_ratio fields are fractions (0.9 = 90%), e.g. a commit ratio
+    # drop of more than 5 points since the last sample:
+    # {"name": "commit_drop", "field": "commit_ratio", "change": true, "op": "<", "value": -0.05}
+    return rules + list(alert_settings.get("rules", []))
+
+
+def format_rule_message(rule, miner_id, value):
+    template = rule.get("message", DEFAULT_RULE_MESSAGE)
+    try:
+        return template.format(
+            name=rule.get("name", rule["field"]), field=rule["field"], value=value,
+            prefix=miner_id[:6], tail=miner_id[-4:], miner=miner_id
+        )
+    except (KeyError, IndexError, ValueError):
+        return DEFAULT_RULE_MESSAGE.format(
+            name=rule.get("name", rule["field"]), field=rule["field"], value=value, prefix=miner_id[:6]
+        )
+
+
+class RuleEngine:
+    def __init__(self, rules=None):
+        self.rules = rules or []
+        self._previous = None
+
+    def _aligned_previous(self, miner_ids):
+        if self._previous is None:
+            return None
+        prev_ids, prev_columns = self._previous
+        index = {miner_id: i for i, miner_id in enumerate(prev_ids)}
+        # Miners without a previous sample point at the trailing NaN pad
+        positions = np.array([index.get(miner_id, -1) for miner_id in miner_ids], dtype=int)
+        return {name: np.append(col, np.nan)[positions] for name, col in prev_columns.items()}
+
+    def evaluate(self, miner_ids, columns, include_levels=True):
+        # Returns (rule, miner_id, value) for every hit. Rules sharing a "group" are
+        # exclusive per miner: the first matching rule in list order wins.
+        n = len(miner_ids)
+        previous = self._aligned_previous(miner_ids)
+        claimed = {}
+        hits = []
+
+        for rule in self.rules:
+            field = rule.get("field")
+            if field not in columns or rule.get("op") not in OPS:
+                continue
+            values = columns[field]
+            if rule.get("change"):
+                if previous is None:
+                    continue
+                values = values - previous[field]
+            elif not include_levels:
+                continue
+
+            with np.errstate(invalid="ignore"):
+                mask = OPS[rule["op"]](values, float(rule.get("value", 0))) & ~np.isnan(values)
+
+            group = rule.get("group")
+            if group:
+                taken = claimed.setdefault(group, np.zeros(n, dtype=bool))
+                mask &= ~taken
+                taken |= mask
+
+            for i in np.flatnonzero(mask):
+                hits.append((rule, miner_ids[i], float(values[i])))
+
+        self._previous = (list(miner_ids), columns)
+        return hits
@@ -0,0 +1,26 @@
+import json
+import os
+import tempfile
+
+
+def atomic_write_text(path, text):
+    # Write to a temp file in the same directory, fsync, then rename over the target,
+    # so a crash leaves either the old file or the new one, never a partial write
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path, data, indent=None):
+    atomic_write_text(path, json.dumps(data, indent=indent))
@@ -0,0 +1,97 @@
+import threading
+from web3 import Web3
+
+TRANSFER_TOPIC = Web3.to_hex(Web3.keccak(text="Transfer(address,address,uint256)"))
+
+
+def topic_address(word):
+    # 32-byte words that hold an address are left-padded with 12 zero bytes
+    data = word[2:] if word.startswith("0x") else word
+    if len(data) != 64 or data[:24].strip("0") or not data[24:].strip("0"):
+        return None
+    return "0x" + data[24:].lower()
+
+
+def addresses_in_log(log):
+    found = set()
+    for topic in log.get("topics", [])[1:]:
+        addr = topic_address(topic)
+        if addr:
+            found.add(addr)
+    data = log.get("data", "0x")[2:]
+    for i in range(0, len(data) - 63, 64):
+        addr = topic_address(data[i:i + 64])
+        if addr:
+            found.add(addr)
+    return found
+
+
+def affected_addresses(logs, token_address, staking_address):
+    # Token Transfers change balances; anything the staking contract emits, or a
+    # transfer to or from it, may change the stake record of the addresses involved
+    token_address, staking_address = token_address.lower(), staking_address.lower()
+    token, stake = set(), set()
+    for log in logs:
+        source = log.get("address", "").lower()
+        topics = log.get("topics", [])
+        if source == token_address and topics and topics[0].lower() == TRANSFER_TOPIC:
+            parties = {topic_address(t) for t in topics[1:3]} - {None}
+            token |= parties
+            if staking_address in parties:
+                stake |= parties
+        elif source == staking_address:
+            involved = addresses_in_log(log)
+            stake |= involved
+            token |= involved
+    token.discard(staking_address)
+    stake.discard(staking_address)
+    return {"token": token, "stake": stake}
+
+
+class BalanceCache:
+    # Raw balance results keyed by (chain, kind, address), each tagged with the block
+    # it is known to be valid at. Entries only carry forward to a newer block when the
+    # caller has proven nothing changed for them (same block, or no logs touching them).
+    def __init__(self):
+        self.entries = {}
+        self.synced = {}
+        self._lock = threading.Lock()
+
+    def get(self, chain, kind, address, block):
+        with self._lock:
+            entry = self.entries.get((chain, kind, address.lower()))
+        if entry is None or block is None or entry[0] != block:
+            return None
+        return entry[1]
+
+    def stale(self, chain, kind, addresses, block):
+        return [addr for addr in addresses if self.get(chain, kind, addr, block) is None]
+
+    def put(self, chain, kind, address, block, value):
+        if block is None or value is None:
+            return
+        with self._lock:
+            self.entries[(chain, kind, address.lower())] = (block, value)
+
+    def synced_block(self, chain):
+        with self._lock:
+            return self.synced.get(chain)
+
+    def advance(self, chain, block, invalidated=None):
+        # invalidated maps kind -> addresses changed since the last synced block;
+        # None means the range could not be checked, so the whole chain is dropped
+        with self._lock:
+            for key in list(self.entries):
+                if key[0] != chain:
+                    continue
+                entry_block, value = self.entries[key]
+                if invalidated is None or key[2] in invalidated.get(key[1], ()):
+                    del self.entries[key]
+                elif entry_block == self.synced.get(chain):
+                    self.entries[key] = (block, value)
+            self.synced[chain] = block
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.synced.clear()
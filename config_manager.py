@@ -1,11 +1,26 @@
+import atexit
+import copy
 import json
+import threading
+import time
+from contextlib import contextmanager
+from atomic_file import atomic_write_text
 
 CONFIG_FILE = "config.json"
+# Changes are written at most this often; flush() writes immediately
+FLUSH_INTERVAL = 1.0
 
 class ConfigManager:
-    def __init__(self):
+    def __init__(self, flush_interval=FLUSH_INTERVAL):
         self.config = self.load_config()
-        
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._timer = None
+        self._last_flush = 0.0
+        self._depth = 0
+        atexit.register(self.flush)
+
     def load_config(self):
         try:
             with open(CONFIG_FILE, "r") as f:
@@ -26,22 +41,82 @@ class ConfigManager:
             }
 
     def save_config(self):
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(self.config, f, indent=4)
+        # Mark the config dirty and schedule a debounced write
+        with self._lock:
+            self._dirty = True
+            if self._depth or self._timer is not None:
+                return
+            delay = max(0.0, self._last_flush + self.flush_interval - time.time())
+            self._timer = threading.Timer(delay, self._timer_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timer_flush(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            data = json.dumps(self.config, indent=4)
+            self._dirty = False
+            self._last_flush = time.time()
+        try:
+            # A crash mid-write leaves the previous config.json intact
+            atomic_write_text(CONFIG_FILE, data)
+        except OSError as e:
+            print(f"Failed to save config: {e}")
+            with self._lock:
+                self._dirty = True
+
+    @contextmanager
+    def update(self):
+        # Change several keys at once; rolled back if the block raises
+        with self._lock:
+            snapshot = copy.deepcopy(self.config) if self._depth == 0 else None
+            self._depth += 1
+            try:
+                yield self.config
+            except Exception:
+                if snapshot is not None:
+                    self.config.clear()
+                    self.config.update(snapshot)
+                raise
+            finally:
+                self._depth -= 1
+            if self._depth == 0:
+                self.save_config()
 
     def get_column_widths(self):
         return self.config.get("column_widths", {})
 
     def save_column_widths(self, widths):
-        self.config["column_widths"] = widths
-        self.save_config()
+        with self._lock:
+            if self.config.get("column_widths") == widths:
+                return
+            self.config["column_widths"] = widths
+            self.save_config()
 
     def get_alert_settings(self):
         return self.config.get("alert_settings", {})
 
     def save_alert_settings(self, settings):
-        self.config["alert_settings"] = settings
-        self.save_config()
+        with self.update() as config:
+            config["alert_settings"] = settings
+
+    def get_collector_settings(self):
+        return self.config.get("collector_settings", {})
+
+    def get_transport_settings(self):
+        return self.config.get("transport_settings", {})
+
+    def get_daemon_settings(self):
+        return self.config.get("daemon_settings", {})
 
     def get_balance_thresholds(self):
         return {
@@ -50,13 +125,13 @@ class ConfigManager:
         }
 
     def save_balance_thresholds(self, eth_low, eth_mid):
-        self.config["eth_balance_low"] = eth_low
-        self.config["eth_balance_mid"] = eth_mid
-        self.save_config()
+        with self.update() as config:
+            config["eth_balance_low"] = eth_low
+            config["eth_balance_mid"] = eth_mid
 
     def get(self, key, default=None):
         return self.config.get(key, default)
 
     def set(self, key, value):
-        self.config[key] = value
-        self.save_config()
+        with self.update() as config:
+            config[key] = value
@@ -1,65 +1,55 @@
 import sys
 import json
+import asyncio
 import threading
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import requests
 from web3 import Web3
+from eth_abi import encode as abi_encode, decode as abi_decode
+from rpc_client import RpcError, aiohttp, encode_address_call, decode_uint256_words
+from rpc_pool import RpcPool
+from balance_cache import BalanceCache, affected_addresses
+from metadata_cache import MetadataCache, checksum_address
+from leaderboard import LeaderboardClient, LEADERBOARD_URL
+import transport
+from atomic_file import atomic_write_json
+from time_format import time_ago
 
-# Global RPC call counter
-rpc_call_count = 0
-
-# ETH on Arbitrum Sepolia
-web3_eth = Web3(Web3.HTTPProvider("https://sepolia-rollup.arbitrum.io/rpc"))
-if not web3_eth.is_connected():
-    print("Failed to connect to Arbitrum Sepolia RPC")
-else:
-    print("Connected to Arbitrum Sepolia RPC")
-
-# Cortensor token on Ethereum mainnet via PublicNode
-web3_token = Web3(Web3.HTTPProvider("https://ethereum-rpc.publicnode.com"))
-if not web3_token.is_connected():
-    print("Failed to connect to Ethereum mainnet via publicnode")
-else:
-    print("Connected to Ethereum mainnet via publicnode")
-
-# Minimal ERC20 ABI
-ERC20_ABI = [
-    {
-        "constant": True,
-        "inputs": [{"name": "_owner", "type": "address"}],
-        "name": "balanceOf",
-        "outputs": [{"name": "balance", "type": "uint256"}],
-        "type": "function"
-    },
-    {
-        "constant": True,
-        "inputs": [],
-        "name": "decimals",
-        "outputs": [{"name": "", "type": "uint8"}],
-        "type": "function"
-    }
-]
+ARBITRUM_SEPOLIA_RPC = "https://sepolia-rollup.arbitrum.io/rpc"
+ETHEREUM_MAINNET_RPC = "https://ethereum-rpc.publicnode.com"
+STATS_FILE = "stats.json"
+# Chain labels used for rpc_endpoints and the balance cache
+ETH_CHAIN = "arbitrum_sepolia"
+TOKEN_CHAIN = "ethereum_mainnet"
 
 # Cortensor token address
 CORTENSOR_TOKEN_ADDRESS = Web3.to_checksum_address("0x8e0EeF788350f40255D86DFE8D91ec0AD3a4547F")
-cortensor_token = web3_token.eth.contract(address=CORTENSOR_TOKEN_ADDRESS, abi=ERC20_ABI)
 
 # Staking contract
 STAKING_CONTRACT_ADDRESS = Web3.to_checksum_address("0x634DAEeCF243c844263D206e1DcF68F310e6BB19")
-STAKING_ABI = [
-    {
-        "inputs": [{"internalType": "address", "name": "", "type": "address"}],
-        "name": "shares",
-        "outputs": [
-            {"internalType": "uint256", "name": "amount", "type": "uint256"},
-            {"internalType": "uint256", "name": "stakedTime", "type": "uint256"}
-        ],
-        "stateMutability": "view",
-        "type": "function"
-    }
-]
-staking_contract = web3_token.eth.contract(address=STAKING_CONTRACT_ADDRESS, abi=STAKING_ABI)
+
+def function_selector(signature):
+    return Web3.to_hex(Web3.keccak(text=signature)[:4])
+
+BALANCE_OF_SELECTOR = function_selector("balanceOf(address)")
+SHARES_SELECTOR = function_selector("shares(address)")
+DECIMALS_SELECTOR = function_selector("decimals()")
+
+# Multicall3 is deployed at the same address on both chains
+MULTICALL3_ADDRESS = Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+AGGREGATE3_SELECTOR = function_selector("aggregate3((address,bool,bytes)[])")
+GET_ETH_BALANCE_SELECTOR = function_selector("getEthBalance(address)")
+
+def encode_aggregate3(calls):
+    encoded = abi_encode(
+        ["(address,bool,bytes)[]"],
+        [[(target, True, bytes.fromhex(data[2:])) for target, data in calls]]
+    )
+    return AGGREGATE3_SELECTOR + encoded.hex()
+
+def decode_aggregate3(result):
+    decoded = abi_decode(["(bool,bytes)[]"], bytes.fromhex(result[2:]))[0]
+    return ["0x" + data.hex() if success else None for success, data in decoded]
 
 def load_miners():
     try:
@@ -79,136 +69,413 @@ def save_miners(miners):
     with open("miners.json", "w") as f:
         json.dump({"miners": miners}, f, indent=4)
 
-def fetch_all_miner_data():
-    try:
-        resp = requests.get("https://lb-be-5.cortensor.network/leaderboard")
-        if resp.status_code == 200:
-            return resp.json()
-    except Exception as e:
-        print("Fetch error:", e)
-    return []
-
 def is_valid_eth_address(addr):
-    return addr.startswith("0x") and len(addr) == 42 and web3_eth.is_address(addr)
-
-def time_ago(timestamp):
-    if not timestamp or timestamp == 0:
-        return "Unknown"
-    now = datetime.now()
-    then = datetime.fromtimestamp(timestamp)
-    delta = now - then
-    seconds = int(delta.total_seconds())
-    if seconds < 60:
-        return f"{seconds} sec ago"
-    elif seconds < 3600:
-        return f"{seconds // 60} min {seconds % 60} sec ago"
-    elif seconds < 86400:
-        return f"{seconds // 3600} hr {(seconds % 3600) // 60} min ago"
-    else:
-        return f"{seconds // 86400} days ago"
-
-def fetch_balances(miner_ids):
-    balances = {}
-    batch_size = 10
-
-    def get_balance(miner_id):
-        global rpc_call_count
+    return addr.startswith("0x") and len(addr) == 42 and Web3.is_address(addr)
+
+def balance_fields(balance):
+    # Stats fields for one miner's entry from fetch_balances
+    balance = balance or {}
+    return {
+        "eth_balance": balance.get("eth", 'N/A'),
+        "cortensor_balance": balance.get("cortensor", 'N/A'),
+        "staked": balance.get("staked", 'N/A'),
+        "staked_time": balance.get("staked_time", 'N/A'),
+        "staked_time_ago": balance.get("staked_time_ago", 'N/A'),
+        "staked_timestamp": balance.get("staked_timestamp")
+    }
+
+def metric_entry(point, counter):
+    # Display strings are derived from these numbers by the UI; ratio is carried for sorting
+    return {
+        "point": point,
+        "counter": counter,
+        "ratio": float(point) / counter if counter else 0.0
+    }
+
+# Long-lived collector: keeps providers, contracts and HTTP sessions alive between refreshes
+class StatsCollector:
+    def __init__(self, settings=None):
+        self.settings = settings or {}
+        endpoints = self.settings.get("rpc_endpoints", {})
+        eth_urls = endpoints.get(ETH_CHAIN) or [ARBITRUM_SEPOLIA_RPC]
+        token_urls = endpoints.get(TOKEN_CHAIN) or [ETHEREUM_MAINNET_RPC]
+
+        self.metadata = MetadataCache()
+        self.leaderboard = LeaderboardClient(transport.get_session(LEADERBOARD_URL))
+
+        # ETH on Arbitrum Sepolia, Cortensor token on Ethereum mainnet; one pool per chain,
+        # extra endpoints are used for failover and hedging
+        pool_args = {
+            "batch_size": self.settings.get("rpc_batch_size", 50),
+            "rate_limits": self.settings.get("rpc_rate_limits", {}),
+            "default_rate": self.settings.get("rpc_requests_per_second", 10),
+            "hedge_after": self.settings.get("rpc_hedge_after", 2.0)
+        }
+        self.eth_rpc = RpcPool(eth_urls, **pool_args)
+        self.token_rpc = RpcPool(token_urls, **pool_args)
+        self.balance_cache = BalanceCache()
+
+        self.rpc_call_count = 0
+        self._count_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._connected = False
+
+    def connect(self):
+        if self._connected:
+            return
+        for name, rpc in (("Arbitrum Sepolia", self.eth_rpc), ("Ethereum mainnet", self.token_rpc)):
+            try:
+                rpc.call("eth_chainId", [])
+                print(f"Connected to {name} RPC via {rpc.url}")
+            except Exception as e:
+                print(f"Failed to connect to {name} RPC: {e}")
+        self._connected = True
+
+        # Prime the metadata cache once so balance lookups never re-read it
         try:
-            if not is_valid_eth_address(miner_id):
-                return
-            addr = Web3.to_checksum_address(miner_id)
-
-            # ETH balance
-            eth_wei = web3_eth.eth.get_balance(addr)
-            rpc_call_count += 1
-            eth_balance = web3_eth.from_wei(eth_wei, 'ether')
-
-            # Cortensor token balance
-            token_balance = cortensor_token.functions.balanceOf(addr).call()
-            rpc_call_count += 1
-            decimals = cortensor_token.functions.decimals().call()
-            rpc_call_count += 1
-            cortensor_balance = token_balance / (10 ** decimals)
-
-            # Staked amount and time
-            staked_info = staking_contract.functions.shares(addr).call()
-            rpc_call_count += 1
-            staked_amount = staked_info[0] / 1e18
-            staked_timestamp = staked_info[1]
-            staked_time_str = datetime.utcfromtimestamp(staked_timestamp).strftime('%Y-%m-%d %H:%M:%S') if staked_timestamp > 0 else "N/A"
-            staked_time_ago = time_ago(staked_timestamp)
-
-            print(f"{addr} -> ETH: {round(eth_balance, 4)} | CORTENSOR: {round(cortensor_balance, 4)} | STAKED: {round(staked_amount, 4)} at {staked_time_str} ({staked_time_ago})")
-
-            balances[addr] = {
-                "eth": float(round(eth_balance, 4)),
-                "cortensor": float(round(cortensor_balance, 4)),
-                "staked": float(round(staked_amount, 4)),
-                "staked_time": staked_time_str,
-                "staked_time_ago": staked_time_ago
-            }
+            self.token_decimals()
         except Exception as e:
-            print(f"Balance error for {miner_id}:", e)
-
-    for i in range(0, len(miner_ids), batch_size):
-        batch = miner_ids[i:i + batch_size]
-        threads = []
-        for m in batch:
-            t = threading.Thread(target=get_balance, args=(m,))
-            t.start()
-            threads.append(t)
-        for t in threads:
-            t.join()
-        if i + batch_size < len(miner_ids):
-            time.sleep(1)
-
-    return balances
+            print("Failed to read token metadata:", e)
 
-def collect_stats():
-    miners = load_miners()
-    raw_data = fetch_all_miner_data()
-    data = [m for m in raw_data if m.get("miner") in miners]
-    balances = fetch_balances(miners)
-
-    stats = {}
-    for miner in data:
-        full_id = miner.get("miner", "")
-        last_active_ts = miner.get("last_active", 0)
-
-        stats[full_id] = {
-            "ping": miner.get("ping_counter", 0),
-            "precommit": {
-                "point": miner.get("precommitPoint", 0),
-                "counter": miner.get("precommitCounter", 1)
-            },
-            "commit": {
-                "point": miner.get("commitPoint", 0),
-                "counter": miner.get("commitCounter", 1)
-            },
-            "prepare": {
-                "point": miner.get("preparePoint", 0),
-                "counter": miner.get("prepareCounter", 1)
-            },
-            "create": {
-                "point": miner.get("createPoint", 0),
-                "counter": miner.get("createCounter", 1)
-            },
-            "last_active": time_ago(last_active_ts),
-            "last_active_timestamp": last_active_ts,
-            "eth_balance": balances.get(full_id, {}).get("eth", 'N/A'),
-            "cortensor_balance": balances.get(full_id, {}).get("cortensor", 'N/A'),
-            "staked": balances.get(full_id, {}).get("staked", 'N/A'),
-            "staked_time": balances.get(full_id, {}).get("staked_time", 'N/A'),
-            "staked_time_ago": balances.get(full_id, {}).get("staked_time_ago", 'N/A')
+    def _count_rpc(self, n=1):
+        with self._count_lock:
+            self.rpc_call_count += n
+
+    def _read_chain_id(self, rpc):
+        return int(rpc.call("eth_chainId", []), 16)
+
+    def token_chain_id(self):
+        # Cached under the first configured endpoint; the pool may answer from any of them
+        return self.metadata.get_chain_id(self.token_rpc.clients[0].url, lambda: self._read_chain_id(self.token_rpc))
+
+    def _read_decimals(self):
+        result = self.token_rpc.call("eth_call", [{"to": CORTENSOR_TOKEN_ADDRESS, "data": DECIMALS_SELECTOR}, "latest"])
+        return decode_uint256_words(result)[0]
+
+    def token_decimals(self):
+        return self.metadata.get_decimals(self.token_chain_id(), CORTENSOR_TOKEN_ADDRESS, self._read_decimals)
+
+    def fetch_all_miner_data(self, miners):
+        return self.leaderboard.fetch(miners)
+
+    @staticmethod
+    def _block_tag(block):
+        return hex(block) if block is not None else "latest"
+
+    def _balance_calls(self, eth_addrs, token_addrs, stake_addrs, eth_block=None, token_block=None):
+        # ETH balances on Arbitrum Sepolia, token balances and stakes on mainnet
+        eth_tag, token_tag = self._block_tag(eth_block), self._block_tag(token_block)
+        eth_calls = [("eth_getBalance", [addr, eth_tag]) for addr in eth_addrs]
+        token_calls = [
+            ("eth_call", [{"to": CORTENSOR_TOKEN_ADDRESS, "data": encode_address_call(BALANCE_OF_SELECTOR, addr)}, token_tag])
+            for addr in token_addrs
+        ] + [
+            ("eth_call", [{"to": STAKING_CONTRACT_ADDRESS, "data": encode_address_call(SHARES_SELECTOR, addr)}, token_tag])
+            for addr in stake_addrs
+        ]
+        return eth_calls, token_calls
+
+    def _multicall_chunks(self, calls, block=None):
+        chunk_size = max(1, int(self.settings.get("multicall_chunk_size", 200)))
+        chunks = [calls[i:i + chunk_size] for i in range(0, len(calls), chunk_size)]
+        rpc_calls = [
+            ("eth_call", [{"to": MULTICALL3_ADDRESS, "data": encode_aggregate3(chunk)}, self._block_tag(block)])
+            for chunk in chunks
+        ]
+        return chunks, rpc_calls
+
+    @staticmethod
+    def _decode_multicall(chunks, results):
+        decoded = []
+        for chunk, result in zip(chunks, results):
+            if result is None:
+                raise RpcError("aggregate3 call failed")
+            decoded.extend(decode_aggregate3(result))
+        return decoded
+
+    def _run_calls(self, eth_calls, token_calls):
+        if self.settings.get("collector_mode", "batch") == "async":
+            if aiohttp is None:
+                print("aiohttp is not installed, using batched collector instead")
+            else:
+                return asyncio.run(self._run_calls_async(eth_calls, token_calls))
+        # Both chains are queried at the same time
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            eth_future = pool.submit(self.eth_rpc.batch, eth_calls)
+            token_future = pool.submit(self.token_rpc.batch, token_calls)
+            return eth_future.result(), token_future.result()
+
+    async def _run_calls_async(self, eth_calls, token_calls):
+        # Chunks for both endpoints are in flight together, bounded by the semaphore
+        # and by each endpoint's token bucket
+        semaphore = asyncio.Semaphore(max(1, int(self.settings.get("max_concurrency", 8))))
+        connector = aiohttp.TCPConnector(limit_per_host=transport.pool_size())
+        async with aiohttp.ClientSession(connector=connector) as http:
+            return await asyncio.gather(
+                self.eth_rpc.batch_async(http, eth_calls, semaphore),
+                self.token_rpc.batch_async(http, token_calls, semaphore)
+            )
+
+    def _read_balances(self, eth_addrs, token_addrs, stake_addrs, eth_block=None, token_block=None):
+        eth_calls, token_calls = self._balance_calls(eth_addrs, token_addrs, stake_addrs, eth_block, token_block)
+        eth_results, token_results = self._run_calls(eth_calls, token_calls)
+        return eth_results, token_results[:len(token_addrs)], token_results[len(token_addrs):]
+
+    def _read_balances_multicall(self, eth_addrs, token_addrs, stake_addrs, eth_block=None, token_block=None):
+        eth_chunks, eth_calls = self._multicall_chunks([
+            (MULTICALL3_ADDRESS, encode_address_call(GET_ETH_BALANCE_SELECTOR, addr)) for addr in eth_addrs
+        ], eth_block)
+        token_chunks, token_calls = self._multicall_chunks(
+            [(CORTENSOR_TOKEN_ADDRESS, encode_address_call(BALANCE_OF_SELECTOR, addr)) for addr in token_addrs] +
+            [(STAKING_CONTRACT_ADDRESS, encode_address_call(SHARES_SELECTOR, addr)) for addr in stake_addrs],
+            token_block
+        )
+        eth_results, token_results = self._run_calls(eth_calls, token_calls)
+        eth_results = self._decode_multicall(eth_chunks, eth_results)
+        token_results = self._decode_multicall(token_chunks, token_results)
+        return eth_results, token_results[:len(token_addrs)], token_results[len(token_addrs):]
+
+    def _block_number(self, rpc):
+        try:
+            return int(rpc.call("eth_blockNumber", []), 16)
+        except Exception as e:
+            print(f"Failed to read block number from {rpc.url}: {e}")
+            return None
+
+    def _token_changes(self, from_block, to_block):
+        # Addresses whose token balance or stake may have changed in (from_block, to_block];
+        # None when the range is too long or the logs cannot be read
+        max_range = int(self.settings.get("max_log_block_range", 5000))
+        if to_block - from_block > max_range:
+            return None
+        try:
+            logs = self.token_rpc.call("eth_getLogs", [{
+                "fromBlock": hex(from_block + 1),
+                "toBlock": hex(to_block),
+                "address": [CORTENSOR_TOKEN_ADDRESS, STAKING_CONTRACT_ADDRESS]
+            }])
+        except Exception as e:
+            print(f"Failed to read token logs: {e}")
+            return None
+        return affected_addresses(logs or [], CORTENSOR_TOKEN_ADDRESS, STAKING_CONTRACT_ADDRESS)
+
+    def _sync_balance_cache(self, token_block):
+        # ETH balances have no logs, so they are only reused within the same block;
+        # token and stake entries carry forward unless a log touched the address
+        # Returns the addresses invalidated by logs, {} when nothing moved, None when unknown
+        synced = self.balance_cache.synced_block(TOKEN_CHAIN)
+        if token_block is None or (synced is not None and token_block <= synced):
+            return {}
+        invalidated = {} if synced is None else self._token_changes(synced, token_block)
+        self.balance_cache.advance(TOKEN_CHAIN, token_block, invalidated)
+        return invalidated
+
+    def _read_uncached(self, addrs):
+        use_cache = self.settings.get("use_balance_cache", True)
+        if use_cache:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                eth_future = pool.submit(self._block_number, self.eth_rpc)
+                token_future = pool.submit(self._block_number, self.token_rpc)
+                eth_block, token_block = eth_future.result(), token_future.result()
+            self._sync_balance_cache(token_block)
+        else:
+            eth_block = token_block = None
+
+        cache = self.balance_cache
+        wanted = {
+            "eth": cache.stale(ETH_CHAIN, "eth", addrs, eth_block),
+            "token": cache.stale(TOKEN_CHAIN, "token", addrs, token_block),
+            "stake": cache.stale(TOKEN_CHAIN, "stake", addrs, token_block)
         }
+        fresh = {kind: {} for kind in wanted}
+        if any(wanted.values()):
+            args = (wanted["eth"], wanted["token"], wanted["stake"], eth_block, token_block)
+            if self.settings.get("use_multicall", False):
+                try:
+                    results = self._read_balances_multicall(*args)
+                except Exception as e:
+                    print(f"Multicall read failed ({e}), falling back to batched calls")
+                    results = self._read_balances(*args)
+            else:
+                results = self._read_balances(*args)
+            for (kind, kind_addrs), kind_results in zip(wanted.items(), results):
+                fresh[kind] = dict(zip(kind_addrs, kind_results))
 
-    stats["__rpc_meta__"] = {
-        "rpc_call_count": rpc_call_count,
-        "timestamp": int(datetime.now().timestamp())
-    }
+        blocks = {"eth": (ETH_CHAIN, eth_block), "token": (TOKEN_CHAIN, token_block), "stake": (TOKEN_CHAIN, token_block)}
+        merged = {}
+        for kind, (chain, block) in blocks.items():
+            values = []
+            for addr in addrs:
+                if addr in fresh[kind]:
+                    value = fresh[kind][addr]
+                    cache.put(chain, kind, addr, block, value)
+                else:
+                    value = cache.get(chain, kind, addr, block)
+                values.append(value)
+            merged[kind] = values
+        return merged["eth"], merged["token"], merged["stake"]
+
+    def fetch_balances(self, miner_ids):
+        balances = {}
+        addrs = [checksum_address(m) for m in miner_ids if is_valid_eth_address(m)]
+        if not addrs:
+            return balances
+
+        try:
+            decimals = self.token_decimals()
+        except Exception as e:
+            print("Failed to read token decimals:", e)
+            return balances
+
+        eth_results, token_results, staking_results = self._read_uncached(addrs)
+
+        for addr, eth_wei, token_raw, staked_raw in zip(addrs, eth_results, token_results, staking_results):
+            try:
+                if eth_wei is None or token_raw is None or staked_raw is None:
+                    raise ValueError("missing RPC result")
+                eth_balance = Web3.from_wei(int(eth_wei, 16), 'ether')
+                cortensor_balance = decode_uint256_words(token_raw)[0] / (10 ** decimals)
+
+                staked_info = decode_uint256_words(staked_raw)
+                staked_amount = staked_info[0] / 1e18
+                staked_timestamp = staked_info[1]
+                staked_time_str = datetime.utcfromtimestamp(staked_timestamp).strftime('%Y-%m-%d %H:%M:%S') if staked_timestamp > 0 else "N/A"
+                staked_time_ago = time_ago(staked_timestamp)
+
+                print(f"{addr} -> ETH: {round(eth_balance, 4)} | CORTENSOR: {round(cortensor_balance, 4)} | STAKED: {round(staked_amount, 4)} at {staked_time_str} ({staked_time_ago})")
+
+                balances[addr] = {
+                    "eth": float(round(eth_balance, 4)),
+                    "cortensor": float(round(cortensor_balance, 4)),
+                    "staked": float(round(staked_amount, 4)),
+                    "staked_time": staked_time_str,
+                    "staked_time_ago": staked_time_ago,
+                    "staked_timestamp": staked_timestamp
+                }
+            except Exception as e:
+                print(f"Balance error for {addr}:", e)
+
+        return balances
+
+    def collect(self, miners=None):
+        with self._lock:
+            self.connect()
+            self.rpc_call_count = 0
+            self.eth_rpc.reset_call_count()
+            self.token_rpc.reset_call_count()
 
-    with open("stats.json", "w") as f:
-        json.dump(stats, f, indent=4)
+            if miners is None:
+                miners = load_miners()
+            # Miners missing from the previous leaderboard can be skipped up front,
+            # so the balance reads never have to wait for this refresh's leaderboard
+            skip_unlisted = self.settings.get("skip_unlisted_balances", False)
+            listed = self.leaderboard.listed_miners
+            balance_ids = [m for m in miners if m in listed] if skip_unlisted and listed is not None else list(miners)
+
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                leaderboard_future = pool.submit(self.fetch_all_miner_data, miners)
+                balance_future = pool.submit(self.fetch_balances, balance_ids)
+                data = leaderboard_future.result()
+                balances = balance_future.result()
+
+            if skip_unlisted:
+                newly_listed = [m for m in data if m not in balance_ids]
+                if newly_listed:
+                    balances.update(self.fetch_balances(newly_listed))
+
+            stats = {}
+            for full_id, miner in data.items():
+                last_active_ts = miner.get("last_active", 0)
+
+                stats[full_id] = {
+                    "ping": miner.get("ping_counter", 0),
+                    "precommit": metric_entry(miner.get("precommitPoint", 0), miner.get("precommitCounter", 1)),
+                    "commit": metric_entry(miner.get("commitPoint", 0), miner.get("commitCounter", 1)),
+                    "prepare": metric_entry(miner.get("preparePoint", 0), miner.get("prepareCounter", 1)),
+                    "create": metric_entry(miner.get("createPoint", 0), miner.get("createCounter", 1)),
+                    "last_active": time_ago(last_active_ts),
+                    "last_active_timestamp": last_active_ts,
+                    **balance_fields(balances.get(full_id))
+                }
+
+            self._count_rpc(self.eth_rpc.call_count + self.token_rpc.call_count)
+            stats["__rpc_meta__"] = {
+                "rpc_call_count": self.rpc_call_count,
+                "timestamp": int(datetime.now().timestamp()),
+                "endpoints": {**self.eth_rpc.status(), **self.token_rpc.status()}
+            }
+
+            return stats
+
+class BalanceTracker:
+    # Optional event mode: between refreshes, scans the token and staking contract logs
+    # for new blocks and re-reads balances only for the miners those logs touch
+    def __init__(self, collector, on_change, interval=15, miners_loader=load_miners):
+        self.collector = collector
+        self.on_change = on_change
+        self.interval = max(1.0, float(interval))
+        self.miners_loader = miners_loader
+        self._stop = threading.Event()
+        self._thread = None
+
+    def poll(self, miners=None):
+        miners = self.miners_loader() if miners is None else miners
+        collector = self.collector
+        with collector._lock:
+            token_block = collector._block_number(collector.token_rpc)
+            invalidated = collector._sync_balance_cache(token_block)
+            if not invalidated:
+                # Nothing new, or the gap was too large; the next full refresh re-reads
+                return {}
+            touched = invalidated.get("token", set()) | invalidated.get("stake", set())
+            affected = [m for m in miners if is_valid_eth_address(m) and m.lower() in touched]
+            if not affected:
+                return {}
+            balances = collector.fetch_balances(affected)
+
+        changes = {}
+        for miner in affected:
+            balance = balances.get(checksum_address(miner))
+            if balance:
+                changes[miner] = balance_fields(balance)
+        return changes
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                changes = self.poll()
+                if changes:
+                    self.on_change(changes)
+            except Exception as e:
+                print(f"Balance event poll failed: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="balance-tracker", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+_collector = None
+_collector_lock = threading.Lock()
+
+def get_collector(settings=None):
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = StatsCollector(settings)
+        return _collector
+
+def write_snapshot(stats, path=STATS_FILE):
+    # Read by the stats bot and as the startup cache, possibly while this runs
+    atomic_write_json(path, stats, indent=4)
+
+def collect_stats():
+    stats = get_collector().collect()
+    write_snapshot(stats)
+    return stats
 
 if __name__ == '__main__':
     collect_stats()
@@ -0,0 +1,234 @@
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import transport
+from config_manager import ConfigManager
+from alert_manager import AlertManager
+from data_fetcher import DataFetcher
+from history_store import HistoryStore
+from stats_report import prepare_stats_report
+
+# Headless collector: runs refreshes, alerting and the stats bot without Qt and
+# serves the latest snapshot and history as JSON. Start with: python daemon.py
+DEFAULT_DAEMON_SETTINGS = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "max_alerts": 200,
+    # Seconds between history samples, recorded on refresh whether or not the stats bot runs
+    "history_interval": 600
+}
+RETENTION_INTERVAL = 15 * 60
+
+
+class CollectorDaemon:
+    def __init__(self, config_manager):
+        self.config_manager = config_manager
+        self.settings = {**DEFAULT_DAEMON_SETTINGS, **config_manager.get_daemon_settings()}
+        self.alert_manager = AlertManager(config_manager)
+        self.data_fetcher = DataFetcher(config_manager, self.alert_manager)
+        self.history = HistoryStore()
+        self.history.import_legacy_json()
+        self.alerts = deque(maxlen=int(self.settings["max_alerts"]))
+        self.updated = 0
+        self._last_history_ts = 0
+        self._last_report_ts = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        if self.data_fetcher.load_cached_snapshot():
+            logging.info("Serving cached snapshot until the first refresh completes")
+
+    # ----- Scheduled work -----
+    def refresh(self):
+        _, alerts = self.data_fetcher.fetch_data()
+        now = time.time()
+        with self._lock:
+            self.updated = now
+            for message in alerts:
+                self.alerts.append({"ts": now, "message": message})
+        logging.info(f"Refreshed {len(self.data_fetcher.cached_stats)} miners, {len(alerts)} alerts")
+        self.record_history(now)
+        self.data_fetcher.start_balance_tracking(self.on_balances_updated)
+
+    def record_history(self, now):
+        stats = self.data_fetcher.cached_stats
+        if not stats or now - self._last_history_ts < float(self.settings["history_interval"]):
+            return
+        try:
+            self.history.record_snapshot(stats, now)
+            self._last_history_ts = now
+        except Exception as e:
+            logging.error(f"Failed to record stats history: {e}")
+
+    def on_balances_updated(self, changes):
+        with self._lock:
+            self.updated = time.time()
+        logging.info(f"Balance events updated {len(changes)} miners")
+
+    def send_stats_report(self):
+        settings = self.config_manager.get("stats_bot", {})
+        if not settings.get("metrics"):
+            logging.warning("Stats bot enabled but no metrics selected")
+            return
+        stats = self.data_fetcher.cached_stats
+        if not stats:
+            return
+        # Compare against the previous report, not the latest periodic history sample
+        now = time.time()
+        compare_before = self._last_report_ts + 1 if self._last_report_ts else now - self._stats_bot_interval() + 1
+        message = prepare_stats_report(self.history, stats, settings, now, compare_before)
+        self._last_report_ts = int(now)
+        self.alert_manager.reload_settings()
+        self.alert_manager.send_telegram_alert(message, skip_duplicate_check=True)
+
+    def apply_retention(self):
+        rolled = self.history.apply_retention(self.config_manager.get("history_retention", {}))
+        if rolled:
+            logging.info(f"Rolled up and pruned {rolled} raw history samples")
+
+    def _refresh_interval(self):
+        return max(10, int(self.config_manager.get("update_frequency", 600)))
+
+    def _stats_bot_interval(self):
+        settings = self.config_manager.get("stats_bot", {})
+        if not settings.get("enabled", False):
+            return None
+        hours = settings.get("interval_hours", settings.get("interval", 1))
+        return max(1, int(hours)) * 3600
+
+    def run(self):
+        # Simple deadline scheduler; every job is retried on its next slot if it fails
+        jobs = {
+            "refresh": (self.refresh, self._refresh_interval),
+            "stats_bot": (self.send_stats_report, self._stats_bot_interval),
+            "retention": (self.apply_retention, lambda: RETENTION_INTERVAL)
+        }
+        now = time.time()
+        due = {"refresh": now, "retention": now + RETENTION_INTERVAL}
+        interval = self._stats_bot_interval()
+        due["stats_bot"] = now + interval if interval else None
+
+        while not self._stop.is_set():
+            now = time.time()
+            for name, (job, get_interval) in jobs.items():
+                interval = get_interval()
+                if interval is None:
+                    due[name] = None
+                    continue
+                if due[name] is None:
+                    due[name] = now + interval
+                if now < due[name]:
+                    continue
+                try:
+                    job()
+                except Exception as e:
+                    logging.error(f"Daemon job {name} failed: {e}")
+                due[name] = time.time() + interval
+            pending = [t for t in due.values() if t is not None]
+            self._stop.wait(max(0.5, min(pending) - time.time()) if pending else 5)
+
+    def stop(self):
+        self._stop.set()
+        self.data_fetcher.stop_balance_tracking()
+        if self._server:
+            self._server.shutdown()
+
+    # ----- Read API -----
+    def snapshot(self):
+        with self._lock:
+            return {
+                "updated": self.updated or None,
+                "refresh_count": self.data_fetcher.rpc_call_count,
+                "stats": self.data_fetcher.cached_stats
+            }
+
+    def alerts_since(self, since_ts):
+        with self._lock:
+            return [alert for alert in self.alerts if alert["ts"] > since_ts]
+
+    def history_for(self, miner, resolution="raw", since_ts=0, limit=1000):
+        if resolution == "raw":
+            return self.history.samples(miner, since_ts, limit)
+        return self.history.rollups(miner, resolution, since_ts)
+
+    def serve(self, host=None, port=None):
+        host = host or self.settings["host"]
+        port = int(port or self.settings["port"])
+        self._server = ThreadingHTTPServer((host, port), ApiHandler)
+        self._server.daemon_threads = True
+        self._server.collector = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logging.info(f"Read API listening on http://{host}:{port}/api/")
+        return self._server
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        collector = self.server.collector
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/api/health":
+                self._send_json({"ok": True, "updated": collector.snapshot()["updated"]})
+            elif url.path == "/api/snapshot":
+                self._send_json(collector.snapshot())
+            elif url.path == "/api/alerts":
+                self._send_json(collector.alerts_since(float(query.get("since", 0))))
+            elif url.path == "/api/history":
+                miner = query.get("miner")
+                if not miner:
+                    self._send_json({"error": "miner is required"}, 400)
+                    return
+                self._send_json(collector.history_for(
+                    miner,
+                    query.get("resolution", "raw"),
+                    float(query.get("since", 0)),
+                    int(query.get("limit", 1000))
+                ))
+            else:
+                self._send_json({"error": "not found"}, 404)
+        except ValueError as e:
+            self._send_json({"error": str(e)}, 400)
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug(f"API {self.address_string()} {format % args}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Cortensor miner collector")
+    parser.add_argument("--host", help="address for the read API (default from daemon_settings)")
+    parser.add_argument("--port", type=int, help="port for the read API (default from daemon_settings)")
+    parser.add_argument("--no-api", action="store_true", help="collect and alert without serving the API")
+    args = parser.parse_args(argv)
+
+    config_manager = ConfigManager()
+    transport.configure(config_manager.get_transport_settings())
+    daemon = CollectorDaemon(config_manager)
+    if not args.no_api:
+        daemon.serve(args.host, args.port)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        config_manager.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
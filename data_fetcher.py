@@ -1,9 +1,13 @@
 import time
-import subprocess
 import json
 import sys
+import threading
+import transport
 from miner_manager import MinerManager
 
+# Written by corbot3.write_snapshot; read here without importing web3
+STATS_FILE = "stats.json"
+
 class DataFetcher:
     def __init__(self, config_manager, alert_manager):
         self.config_manager = config_manager
@@ -12,6 +16,67 @@ class DataFetcher:
         self.last_update_time = time.time()
         self.cached_stats = {}
         self._initialized = False
+        self.collector = None
+        self.tracker = None
+        self._on_balance_update = None
+        self._stats_lock = threading.Lock()
+
+    def _get_collector(self):
+        if self.collector is None:
+            # Imported on first refresh so web3 stays off the startup path
+            import corbot3
+            self.collector = corbot3.get_collector(self.config_manager.get_collector_settings())
+        return self.collector
+
+    def start_balance_tracking(self, on_update=None):
+        # Event mode (collector_settings.event_tracking): push balance changes between refreshes
+        settings = self.config_manager.get_collector_settings()
+        if not settings.get("event_tracking", False) or self.tracker is not None:
+            return False
+        import corbot3
+        self._on_balance_update = on_update
+        self.tracker = corbot3.BalanceTracker(
+            self._get_collector(), self.apply_balance_changes, settings.get("event_poll_interval", 15)
+        )
+        self.tracker.start()
+        return True
+
+    def stop_balance_tracking(self):
+        if self.tracker is not None:
+            self.tracker.stop()
+
+    def apply_balance_changes(self, changes):
+        with self._stats_lock:
+            cached = dict(self.cached_stats)
+            applied = {}
+            for miner_id, fields in changes.items():
+                if miner_id in cached:
+                    cached[miner_id] = {**cached[miner_id], **fields}
+                    applied[miner_id] = fields
+            self.cached_stats = cached
+        if applied and self._on_balance_update:
+            self._on_balance_update(applied)
+        return applied
+
+    def load_cached_snapshot(self, path=STATS_FILE):
+        # Last written snapshot, shown while the first live refresh runs
+        try:
+            with open(path, "r") as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            return False
+        offline_seconds = self.alert_manager.offline_threshold_seconds()
+        now = time.time()
+        cached = {}
+        for miner_id in MinerManager.load_miners():
+            data = stats.get(miner_id)
+            if not isinstance(data, dict):
+                continue
+            last_active = data.get("last_active_timestamp")
+            is_offline = not isinstance(last_active, (int, float)) or now - last_active > offline_seconds
+            cached[miner_id] = {**data, "is_offline": is_offline}
+        self.cached_stats = cached
+        return bool(cached)
 
     def fetch_data(self):
         self.rpc_call_count += 1
@@ -20,35 +85,32 @@ class DataFetcher:
         self.alert_manager.session_alerts_sent.clear()
 
         try:
-            subprocess.run(["python", "corbot3.py"], check=True)
-            with open("stats.json", "r") as f:
-                stats = json.load(f)
+            stats = self._get_collector().collect()
+            # An empty result (e.g. leaderboard unreachable) must not replace the startup snapshot
+            has_miners = any(not key.startswith("__") for key in stats)
+            if has_miners and self.config_manager.get("write_stats_snapshot", True):
+                import corbot3
+                corbot3.write_snapshot(stats, STATS_FILE)
         except Exception as e:
             print(f"Failed to update or load stats: {e}")
             stats = {}
 
         stats_list = []
-        alert_settings = self.config_manager.get_alert_settings()
-        offline_threshold_sec = alert_settings.get("miner_offline_minutes", 10) * 60
         known_miners = MinerManager.load_miners()
         current_time = time.time()
 
-        for miner_id in known_miners:
+        # Miners missing from stats count as offline; balance rules start after the first refresh
+        offline_flags = self.alert_manager.evaluate_fleet(
+            known_miners, stats, current_time, include_levels=self._initialized
+        )
+
+        offline_by_miner = {}
+        for miner_id, is_offline in zip(known_miners, offline_flags):
             if miner_id not in stats:
-                self.alert_manager.check_miner_status(miner_id, True, current_time)
                 continue
+            offline_by_miner[miner_id] = bool(is_offline)
 
             miner_data = stats.get(miner_id, {})
-            last_active_ts = miner_data.get("last_active_timestamp", 0)
-            seconds_ago = current_time - last_active_ts if last_active_ts else float('inf')
-            is_offline = seconds_ago > offline_threshold_sec
-
-            self.alert_manager.check_miner_status(miner_id, is_offline, current_time)
-
-            if self._initialized:
-                eth_balance = miner_data.get("eth_balance", 0.0)
-                self.alert_manager.check_balance_alerts(miner_id, eth_balance)
-
             stats_list.append({
                 "miner_id": miner_id,
                 "ping": miner_data.get("ping", 0),
@@ -58,13 +120,66 @@ class DataFetcher:
                 "create": miner_data.get("create", {}),
                 "last_active": miner_data.get("last_active", "Unknown"),
                 "eth_balance": miner_data.get("eth_balance", 0.0),
-                "is_offline": is_offline
+                "is_offline": bool(is_offline)
             })
 
+        # Alerts raised in this refresh go out as one queued digest
+        self.alert_manager.flush_alerts()
+        self.alert_manager.flush_status()
+
         # ✅ Save the full filtered dictionary (not the list)
-        filtered_stats = {miner_id: stats[miner_id] for miner_id in known_miners if miner_id in stats}
-        self.cached_stats = filtered_stats
+        filtered_stats = {
+            miner_id: {**stats[miner_id], "is_offline": offline_by_miner[miner_id]}
+            for miner_id in known_miners if miner_id in stats
+        }
+        with self._stats_lock:
+            self.cached_stats = filtered_stats
         self.last_update_time = current_time
         self._initialized = True
 
         return stats_list, self.alert_manager.get_session_alerts()
+
+
+class RemoteDataFetcher:
+    # Thin-client mode: polls a running daemon.py instead of collecting locally
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.rpc_call_count = 0
+        self.last_update_time = time.time()
+        self.cached_stats = {}
+        self._last_alert_ts = 0
+
+    def _get(self, path, params=None):
+        url = f"{self.base_url}{path}"
+        resp = transport.get_session(url).get(url, params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def start_balance_tracking(self, on_update=None):
+        # The daemon tracks events; its changes arrive with the next poll
+        return False
+
+    def stop_balance_tracking(self):
+        pass
+
+    def load_cached_snapshot(self):
+        # Nothing is cached locally; the first refresh polls the daemon off the GUI thread
+        return False
+
+    def fetch_data(self):
+        try:
+            snapshot = self._get("/api/snapshot")
+            alerts = self._get("/api/alerts", {"since": self._last_alert_ts})
+        except Exception as e:
+            print(f"Failed to poll collector daemon: {e}")
+            self.last_update_time = time.time()
+            return [], []
+
+        self.cached_stats = snapshot.get("stats", {})
+        self.rpc_call_count = snapshot.get("refresh_count", self.rpc_call_count)
+        self.last_update_time = time.time()
+        if alerts:
+            self._last_alert_ts = max(alert["ts"] for alert in alerts)
+        stats_list = [{"miner_id": miner_id, **data} for miner_id, data in self.cached_stats.items()]
+        return stats_list, [alert["message"] for alert in alerts]
@@ -0,0 +1,256 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+HISTORY_DB_FILE = "stats_history.db"
+LEGACY_BOT_STATS_FILE = "bot_stats.json"
+METRICS = ("precommit", "commit", "prepare", "create")
+
+SAMPLE_COLUMNS = (
+    ["miner", "ts", "ping"] +
+    [f"{m}_{part}" for m in METRICS for part in ("point", "counter")] +
+    ["eth_balance", "cortensor_balance", "staked", "last_active"]
+)
+
+# Values kept in hourly/daily rollups, each as min, max and last
+ROLLUP_VALUES = [f"{m}_ratio" for m in METRICS] + ["eth_balance", "staked"]
+ROLLUP_RESOLUTIONS = {"hour": 3600, "day": 86400}
+DEFAULT_RETENTION = {
+    "raw_days": 7,
+    "hourly_days": 90,
+    "daily_days": 730,
+    "batch_rows": 5000
+}
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) else None
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        metric_columns = "".join(f"{m}_point INTEGER, {m}_counter INTEGER, " for m in METRICS)
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                "miner TEXT NOT NULL, ts INTEGER NOT NULL, ping INTEGER, "
+                f"{metric_columns}"
+                "eth_balance REAL, cortensor_balance REAL, staked REAL, last_active INTEGER)"
+            )
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_samples_miner_ts ON samples (miner, ts)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples (ts)")
+
+            rollup_columns = "".join(f"{v}_min REAL, {v}_max REAL, {v}_last REAL, " for v in ROLLUP_VALUES)
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS rollups ("
+                "resolution TEXT NOT NULL, miner TEXT NOT NULL, bucket_ts INTEGER NOT NULL, "
+                f"samples INTEGER NOT NULL, last_ts INTEGER NOT NULL, {rollup_columns.rstrip(', ')})"
+            )
+            self.conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_rollups_key ON rollups (resolution, miner, bucket_ts)"
+            )
+
+    @staticmethod
+    def _sample_row(miner, ts, data):
+        row = [miner, ts, _number(data.get("ping"))]
+        for metric in METRICS:
+            m = data.get(metric, {}) if isinstance(data.get(metric), dict) else {}
+            row += [_number(m.get("point")), _number(m.get("counter"))]
+        row += [
+            _number(data.get("eth_balance")),
+            _number(data.get("cortensor_balance")),
+            _number(data.get("staked")),
+            _number(data.get("last_active_timestamp"))
+        ]
+        return row
+
+    def _snapshot_rows(self, stats, ts):
+        return [
+            self._sample_row(miner, ts, data)
+            for miner, data in stats.items()
+            if not miner.startswith("__") and isinstance(data, dict)
+        ]
+
+    def _insert_samples(self, rows):
+        placeholders = ", ".join("?" for _ in SAMPLE_COLUMNS)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO samples ({', '.join(SAMPLE_COLUMNS)}) VALUES ({placeholders})",
+                rows
+            )
+
+    def record_snapshot(self, stats, ts=None):
+        ts = int(ts if ts is not None else time.time())
+        self._insert_samples(self._snapshot_rows(stats, ts))
+        return ts
+
+    @staticmethod
+    def row_to_stats(row):
+        data = {"ping": row["ping"], "timestamp": row["ts"]}
+        for metric in METRICS:
+            point, counter = row[f"{metric}_point"], row[f"{metric}_counter"]
+            data[metric] = {"point": point if point is not None else 0, "counter": counter if counter is not None else 1}
+        data["eth_balance"] = row["eth_balance"]
+        data["cortensor_balance"] = row["cortensor_balance"]
+        data["staked"] = row["staked"]
+        data["last_active_timestamp"] = row["last_active"]
+        return data
+
+    def previous_snapshot(self, miners, before_ts):
+        # The last full snapshot recorded before before_ts, limited to the given miners
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM samples WHERE ts = (SELECT MAX(ts) FROM samples WHERE ts < ?)",
+                (int(before_ts),)
+            ).fetchall()
+        wanted = set(miners)
+        return {row["miner"]: self.row_to_stats(row) for row in rows if row["miner"] in wanted}
+
+    def samples(self, miner, since_ts=0, limit=1000):
+        # Most recent raw samples, returned oldest first
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM samples WHERE miner = ? AND ts >= ? ORDER BY ts DESC LIMIT ?",
+                (miner, int(since_ts), int(limit))
+            ).fetchall()
+        return [self.row_to_stats(row) for row in reversed(rows)]
+
+    def rollups(self, miner, resolution="hour", since_ts=0):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM rollups WHERE resolution = ? AND miner = ? AND bucket_ts >= ? ORDER BY bucket_ts",
+                (resolution, miner, int(since_ts))
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _rollup_values(row):
+        values = {}
+        for metric in METRICS:
+            point, counter = row[f"{metric}_point"], row[f"{metric}_counter"]
+            values[f"{metric}_ratio"] = point / counter if point is not None and counter else None
+        values["eth_balance"] = row["eth_balance"]
+        values["staked"] = row["staked"]
+        return values
+
+    def _rollup_upsert_sql(self):
+        columns = ["resolution", "miner", "bucket_ts", "samples", "last_ts"]
+        updates = ["samples = samples + excluded.samples", "last_ts = MAX(last_ts, excluded.last_ts)"]
+        for v in ROLLUP_VALUES:
+            columns += [f"{v}_min", f"{v}_max", f"{v}_last"]
+            # Scalar MIN/MAX return NULL if either side is NULL, so coalesce first
+            updates += [
+                f"{v}_min = MIN(COALESCE({v}_min, excluded.{v}_min), COALESCE(excluded.{v}_min, {v}_min))",
+                f"{v}_max = MAX(COALESCE({v}_max, excluded.{v}_max), COALESCE(excluded.{v}_max, {v}_max))",
+                f"{v}_last = CASE WHEN excluded.last_ts >= last_ts THEN excluded.{v}_last ELSE {v}_last END"
+            ]
+        return (
+            f"INSERT INTO rollups ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT (resolution, miner, bucket_ts) DO UPDATE SET {', '.join(updates)}"
+        )
+
+    def _aggregate(self, rows):
+        buckets = {}
+        for row in rows:
+            values = self._rollup_values(row)
+            for resolution, size in ROLLUP_RESOLUTIONS.items():
+                key = (resolution, row["miner"], row["ts"] - row["ts"] % size)
+                agg = buckets.get(key)
+                if agg is None:
+                    agg = buckets[key] = {"samples": 0, "last_ts": row["ts"], "min": {}, "max": {}, "last": {}}
+                agg["samples"] += 1
+                for v, value in values.items():
+                    if value is None:
+                        continue
+                    agg["min"][v] = min(agg["min"].get(v, value), value)
+                    agg["max"][v] = max(agg["max"].get(v, value), value)
+                    # rows arrive ordered by ts, so the latest one wins
+                    agg["last"][v] = value
+                agg["last_ts"] = row["ts"]
+
+        params = []
+        for (resolution, miner, bucket_ts), agg in buckets.items():
+            row = [resolution, miner, bucket_ts, agg["samples"], agg["last_ts"]]
+            for v in ROLLUP_VALUES:
+                row += [agg["min"].get(v), agg["max"].get(v), agg["last"].get(v)]
+            params.append(row)
+        return params
+
+    def apply_retention(self, settings=None, now=None, time_budget=1.0):
+        # Rolls raw samples older than the raw window into hourly and daily buckets and
+        # prunes them, one bounded batch at a time so a large backlog never blocks for long
+        cfg = {**DEFAULT_RETENTION, **(settings or {})}
+        now = int(now if now is not None else time.time())
+        raw_cutoff = now - int(cfg["raw_days"] * 86400)
+        hourly_cutoff = now - int(cfg["hourly_days"] * 86400)
+        daily_cutoff = now - int(cfg["daily_days"] * 86400)
+        batch_rows = max(1, int(cfg["batch_rows"]))
+        upsert_sql = self._rollup_upsert_sql()
+
+        rolled = 0
+        started = time.monotonic()
+        while time.monotonic() - started < time_budget:
+            with self._lock, self.conn:
+                rows = self.conn.execute(
+                    "SELECT rowid, * FROM samples WHERE ts < ? ORDER BY ts LIMIT ?",
+                    (raw_cutoff, batch_rows)
+                ).fetchall()
+                if not rows:
+                    break
+                self.conn.executemany(upsert_sql, self._aggregate(rows))
+                self.conn.executemany("DELETE FROM samples WHERE rowid = ?", [(row["rowid"],) for row in rows])
+            rolled += len(rows)
+            if len(rows) < batch_rows:
+                break
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM rollups WHERE (resolution = 'hour' AND bucket_ts < ?) "
+                "OR (resolution = 'day' AND bucket_ts < ?)",
+                (hourly_cutoff, daily_cutoff)
+            )
+        return rolled
+
+    def sample_count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
+
+    def import_legacy_json(self, path=LEGACY_BOT_STATS_FILE):
+        # One-off migration of the old append-only bot_stats.json
+        if not os.path.exists(path) or self.sample_count():
+            return 0
+        try:
+            with open(path, "r") as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Failed to import {path}: {e}")
+            return 0
+
+        # Everything goes in as one transaction rather than one commit per entry
+        rows = []
+        imported = 0
+        for entry in entries:
+            try:
+                ts = int(time.mktime(time.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S")))
+                rows.extend(self._snapshot_rows(entry.get("data", {}), ts))
+                imported += 1
+            except Exception as e:
+                print(f"Skipping malformed history entry: {e}")
+        self._insert_samples(rows)
+        os.replace(path, path + ".migrated")
+        return imported
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,90 @@
+import codecs
+import json
+import transport
+
+LEADERBOARD_URL = "https://lb-be-5.cortensor.network/leaderboard"
+
+
+def iter_json_array(chunks):
+    # Yields the elements of a top-level JSON array without holding the whole payload
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    started = False
+    for chunk in chunks:
+        buf = buf[pos:] + utf8.decode(chunk)
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                break
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError("leaderboard payload is not a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element continues in the next chunk
+            pos = end
+            yield item
+    # Only a closing "]" ends the array; running out of data first means the body was cut off
+    raise ValueError("truncated leaderboard payload")
+
+
+class LeaderboardClient:
+    def __init__(self, session=None, url=LEADERBOARD_URL, timeout=30):
+        self.session = session or transport.get_session(url)
+        self.url = url
+        self.timeout = timeout
+        self.etag = None
+        self.last_modified = None
+        self._cached_miners = None
+        self._cached_entries = {}
+
+    @property
+    def listed_miners(self):
+        # Fleet members present in the last successful fetch, or None before the first one
+        if self._cached_miners is None:
+            return None
+        return set(self._cached_entries)
+
+    def fetch(self, miners):
+        wanted = set(miners)
+        headers = {}
+        # Conditional requests are only valid while the cached entries cover the same fleet
+        if wanted == self._cached_miners:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        try:
+            with self.session.get(self.url, headers=headers, timeout=self.timeout, stream=True) as resp:
+                if resp.status_code == 304:
+                    return dict(self._cached_entries)
+                if resp.status_code != 200:
+                    print(f"Leaderboard fetch failed: HTTP {resp.status_code}")
+                    return {}
+
+                entries = {}
+                for item in iter_json_array(resp.iter_content(chunk_size=65536)):
+                    if isinstance(item, dict) and item.get("miner") in wanted:
+                        entries[item["miner"]] = item
+
+                # Reached only after a complete parse; a truncated body raises above and
+                # leaves the previous entries and validators in place
+                self.etag = resp.headers.get("ETag")
+                self.last_modified = resp.headers.get("Last-Modified")
+                self._cached_miners = wanted
+                self._cached_entries = entries
+                return dict(entries)
+        except Exception as e:
+            print("Fetch error:", e)
+        return {}
@@ -1,9 +1,7 @@
 import sys
 import time
-import json
 import datetime
-import requests
-import corbot3
+import transport
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QHeaderView, QVBoxLayout, QHBoxLayout,
     QTabWidget, QMessageBox, QPushButton, QLabel
@@ -12,10 +10,11 @@ from PyQt5.QtCore import Qt, QTimer
 from config_manager import ConfigManager
 from alert_manager import AlertManager
 from miner_manager import MinerManager
-from data_fetcher import DataFetcher
+from data_fetcher import DataFetcher, RemoteDataFetcher
 from table_renderer import TableRenderer
 from ui_builder import UIBuilder
 from stats_bot_tab import StatsBotTab
+from refresh_worker import RefreshWorker, BackgroundTask
 
 
 class Dashboard(QWidget):
@@ -32,11 +31,20 @@ class Dashboard(QWidget):
 
         # core managers
         self.config_manager = ConfigManager()
+        transport.configure(self.config_manager.get_transport_settings())
         self.alert_manager = AlertManager(self.config_manager)
         self.miner_manager = MinerManager()
-        self.data_fetcher = DataFetcher(self.config_manager, self.alert_manager)
+        # With daemon_settings.url set the GUI only displays what daemon.py collects
+        daemon_url = self.config_manager.get_daemon_settings().get("url")
+        if daemon_url:
+            self.data_fetcher = RemoteDataFetcher(daemon_url)
+        else:
+            self.data_fetcher = DataFetcher(self.config_manager, self.alert_manager)
         self.table_renderer = TableRenderer(self.config_manager)
         self.ui = UIBuilder(self.config_manager)
+        self.refresh_worker = RefreshWorker(self.data_fetcher, self)
+        self.refresh_worker.data_ready.connect(self.on_data_loaded)
+        self.refresh_worker.balances_updated.connect(self.on_balances_updated)
 
         # tabs setup
         self.tabs = QTabWidget()
@@ -44,7 +52,7 @@ class Dashboard(QWidget):
         self.miner_ui = self.ui.create_miner_tab()
         self.settings_ui = self.ui.create_settings_tab()
         self.alert_ui = self.ui.create_alert_tab()
-        self.stats_bot_ui = StatsBotTab(self.config_manager)
+        self.stats_bot_ui = StatsBotTab(self.config_manager, lambda: self.data_fetcher.cached_stats)
 
         self.tabs.addTab(self.dashboard_ui["tab"], "Main Display")
         self.tabs.addTab(self.miner_ui["tab"], "Add/Remove Miner")
@@ -87,23 +95,27 @@ class Dashboard(QWidget):
         self.stats_bot_timer.timeout.connect(self.run_stats_bot)
         self.update_stats_bot_timer()
 
-        # version-check initialization
+        # version-check initialization; the request itself runs off the GUI thread
         self._init_version_check_state()
-        self._check_for_update(force=True)
+        self.version_task = BackgroundTask(self._fetch_remote_version, self)
+        self.version_task.result_ready.connect(self._on_version_checked)
+        QTimer.singleShot(0, lambda: self._check_for_update(force=True))
         self.version_timer = QTimer(self)
         self.version_timer.timeout.connect(self._check_for_update)
         self.version_timer.start(24 * 3600 * 1000)
 
-        # load persisted data and settings
-        self.load_data()
+        # show the last snapshot right away; the live refresh starts once the window is up
+        if self.data_fetcher.load_cached_snapshot():
+            self.dashboard_ui["last_update_label"].setText("Last Update: cached snapshot")
+            self.render_table()
         self.load_stats_bot_config()
+        QTimer.singleShot(0, self.load_data)
 
     # ----- Version-check methods -----
     def _init_version_check_state(self):
-        cfg = self.config_manager.config.setdefault("version_check", {})
-        if "last_checked" not in cfg:
-            cfg["last_checked"] = "1970-01-01T00:00:00"
-            self.config_manager.save_config()
+        if "last_checked" not in self.config_manager.get("version_check", {}):
+            with self.config_manager.update() as config:
+                config.setdefault("version_check", {})["last_checked"] = "1970-01-01T00:00:00"
 
     def _check_for_update(self, force=False):
         cfg = self.config_manager.config.get("version_check", {})
@@ -115,15 +127,21 @@ class Dashboard(QWidget):
             self.version_label.setText(f"Version: {self.CURRENT_VERSION} (Up to date)")
             return
 
-        try:
-            resp = requests.get(self.VERSION_API_URL, timeout=5)
-            resp.raise_for_status()
-            data = resp.json()
-            remote_version = data.get("tag_name", "").lstrip("v")
-        except Exception:
+        if not self.version_task.isRunning():
+            self.version_task.start()
+
+    def _fetch_remote_version(self):
+        # Runs in the background task
+        resp = transport.get_session(self.VERSION_API_URL).get(self.VERSION_API_URL, timeout=5)
+        resp.raise_for_status()
+        return resp.json().get("tag_name", "").lstrip("v")
+
+    def _on_version_checked(self, remote_version):
+        if remote_version is None:
             self.version_label.setText(f"Version: {self.CURRENT_VERSION} (Status unknown)")
             return
 
+        now = datetime.datetime.utcnow()
         if self._version_greater(remote_version, self.CURRENT_VERSION.lstrip('v')):
             self.version_label.setText(
                 f"Version: {self.CURRENT_VERSION} → v{remote_version} (Update available)"
@@ -131,8 +149,8 @@ class Dashboard(QWidget):
         else:
             self.version_label.setText(f"Version: {self.CURRENT_VERSION} (Up to date)")
 
-        cfg["last_checked"] = now.isoformat()
-        self.config_manager.save_config()
+        with self.config_manager.update() as config:
+            config.setdefault("version_check", {})["last_checked"] = now.isoformat()
 
     @staticmethod
     def _version_greater(a, b):
@@ -148,6 +166,9 @@ class Dashboard(QWidget):
         self.dashboard_ui["table"].horizontalHeader().setSectionResizeMode(
             QHeaderView.Interactive
         )
+        self.dashboard_ui["filter_input"].textChanged.connect(
+            self.table_renderer.set_filter
+        )
 
         self.miner_ui["add_button"].clicked.connect(self.add_miner)
         self.miner_ui["remove_button"].clicked.connect(self.remove_miner)
@@ -176,10 +197,13 @@ class Dashboard(QWidget):
 
     def handle_header_click(self, index):
         self.table_renderer.handle_header_click(index, self.dashboard_ui["table"])
-        self.render_table()
 
     def load_data(self):
-        stats, alerts = self.data_fetcher.fetch_data()
+        self.dashboard_ui["refresh_animation"].setVisible(True)
+        self.dashboard_ui["refresh_movie"].start()
+        self.refresh_worker.request_refresh()
+
+    def on_data_loaded(self, stats, alerts):
         if stats:
             for msg in alerts:
                 self.alert_ui["alert_history"].append(
@@ -194,6 +218,11 @@ class Dashboard(QWidget):
         self.dashboard_ui["refresh_movie"].stop()
         self.dashboard_ui["refresh_animation"].setVisible(False)
         self.render_table()
+        # Started after the first refresh so the collector already exists
+        self.data_fetcher.start_balance_tracking(self.refresh_worker.balances_updated.emit)
+
+    def on_balances_updated(self, changes):
+        self.render_table()
 
     def render_table(self):
         self.table_renderer.render_table(
@@ -208,7 +237,9 @@ class Dashboard(QWidget):
         self.dashboard_ui["next_update_label"].setText(
             f"Next Update In: {remaining}s"
         )
-        if remaining <= 0:
+        # Keep "time ago" cells current between data refreshes
+        self.table_renderer.refresh_relative_times()
+        if remaining <= 0 and not self.refresh_worker.isRunning():
             self.load_data()
 
     def update_stats_bot_timer(self):
@@ -231,8 +262,7 @@ class Dashboard(QWidget):
             "include_timestamp": self.stats_bot_ui.include_timestamp_checkbox.isChecked(),
             "compare_over_time": self.stats_bot_ui.compare_checkbox.isChecked()
         }
-        self.config_manager.config["stats_bot"] = cfg
-        self.config_manager.save_config()
+        self.config_manager.set("stats_bot", cfg)
         QMessageBox.information(self, "Saved", "Stats Bot settings saved.")
 
     def load_stats_bot_config(self):
@@ -295,7 +325,7 @@ class Dashboard(QWidget):
         self.alert_ui["alert_history"].append(
             f"[{time.strftime('%H:%M:%S')}] Alert settings updated"
         )
-        self.alert_manager = AlertManager(self.config_manager)
+        self.alert_manager.reload_settings()
 
     def clear_alerts(self):
         reply = QMessageBox.question(
@@ -305,8 +335,7 @@ class Dashboard(QWidget):
         )
         if reply == QMessageBox.Yes:
             try:
-                with open("sent_alerts.json", "w") as f:
-                    json.dump([], f)
+                self.alert_manager.clear_sent_alerts()
                 QMessageBox.information(self, "Alerts Cleared", "All persistent alerts have been cleared.")
                 self.alert_ui["alert_history"].append(
                     f"[{time.strftime('%H:%M:%S')}] Alerts cleared manually"
@@ -317,9 +346,15 @@ class Dashboard(QWidget):
     def closeEvent(self, event):
         col_widths = {}
         tbl = self.dashboard_ui["table"]
-        for i in range(tbl.columnCount()):
+        for i in range(tbl.horizontalHeader().count()):
             col_widths[str(i)] = tbl.columnWidth(i)
         self.config_manager.save_column_widths(col_widths)
+        self.config_manager.flush()
+        self.data_fetcher.stop_balance_tracking()
+        self.refresh_worker.cancel_pending()
+        self.refresh_worker.wait()
+        self.version_task.wait()
+        self.stats_bot_ui.shutdown()
         event.accept()
 
 
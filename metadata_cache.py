@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+from functools import lru_cache
+from web3 import Web3
+from atomic_file import atomic_write_json
+
+METADATA_CACHE_FILE = "token_metadata.json"
+
+
+@lru_cache(maxsize=None)
+def checksum_address(address):
+    return Web3.to_checksum_address(address)
+
+
+class MetadataCache:
+    def __init__(self, path=METADATA_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        data = self._load()
+        self.chain_ids = data.get("chain_ids", {})
+        # Only decimals are kept per contract; ABIs written by older versions are dropped
+        self.contracts = {
+            key: {k: v for k, v in entry.items() if k != "abi"}
+            for key, entry in data.get("contracts", {}).items()
+        }
+
+    def _load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Failed to load {self.path}: {e}")
+        return {}
+
+    def _save(self):
+        try:
+            atomic_write_json(self.path, {"chain_ids": self.chain_ids, "contracts": self.contracts}, indent=4)
+        except Exception as e:
+            print(f"Failed to save {self.path}: {e}")
+
+    @staticmethod
+    def _key(chain_id, address):
+        return f"{chain_id}:{checksum_address(address)}"
+
+    def get_chain_id(self, rpc_url, loader):
+        with self._lock:
+            if rpc_url in self.chain_ids:
+                return self.chain_ids[rpc_url]
+        chain_id = int(loader())
+        with self._lock:
+            self.chain_ids[rpc_url] = chain_id
+            self._save()
+        return chain_id
+
+    def get_decimals(self, chain_id, address, loader):
+        key = self._key(chain_id, address)
+        with self._lock:
+            entry = self.contracts.get(key, {})
+            if "decimals" in entry:
+                return entry["decimals"]
+        decimals = int(loader())
+        with self._lock:
+            self.contracts.setdefault(key, {})["decimals"] = decimals
+            self._save()
+        return decimals
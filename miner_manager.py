@@ -1,6 +1,5 @@
 # miner_manager.py
 import json
-from PyQt5.QtWidgets import QMessageBox
 
 class MinerManager:
     @staticmethod
@@ -18,6 +17,7 @@ class MinerManager:
             json.dump({"miners": miners}, f, indent=4)
     
     def add_miner(self, miner_id, parent):
+        from PyQt5.QtWidgets import QMessageBox
         if not miner_id:
             QMessageBox.warning(parent, "Warning", "Please enter a miner address")
             return False
@@ -34,6 +34,7 @@ class MinerManager:
         return True
     
     def remove_miner(self, miner_id, parent):
+        from PyQt5.QtWidgets import QMessageBox
         if not miner_id:
             QMessageBox.warning(parent, "Warning", "Please enter a miner address")
             return False
@@ -0,0 +1,198 @@
+import math
+import time
+import numpy as np
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QVariant
+from PyQt5.QtGui import QBrush, QColor
+from time_format import time_ago
+
+SORT_ROLE = Qt.UserRole + 1
+
+HEADERS = [
+    "Miner ID", "Ping", "Precommit (P/C)", "Commit (P/C)",
+    "Prepare (P/C)", "Create (P/C)", "Last Active", "ETH Balance",
+    "Staked", "Staked Time Ago"
+]
+METRICS = ("precommit", "commit", "prepare", "create")
+NUMERIC_FIELDS = ["ping", "last_active_timestamp", "eth_balance", "staked", "staked_timestamp"] + \
+    [f"{m}_{part}" for m in METRICS for part in ("point", "counter", "ratio")]
+
+COL_MINER, COL_PING, COL_LAST_ACTIVE, COL_ETH, COL_STAKED, COL_STAKED_AGO = 0, 1, 6, 7, 8, 9
+METRIC_COLUMNS = {2: "precommit", 3: "commit", 4: "prepare", 5: "create"}
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class MinerTableModel(QAbstractTableModel):
+    # Column-oriented store: one numpy array per numeric field plus precomputed sort keys
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.miner_ids = []
+        self.numeric = {name: np.zeros(0) for name in NUMERIC_FIELDS}
+        self.offline = np.zeros(0, dtype=bool)
+        self.sort_keys = {}
+        self.thresholds = {"eth_low": 1.5, "eth_mid": 3.0}
+        self._brushes = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.miner_ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal and 0 <= section < len(HEADERS):
+            return HEADERS[section]
+        return QVariant()
+
+    def set_stats(self, stats_dict, thresholds=None):
+        if thresholds:
+            self.thresholds = thresholds
+        ids = [miner_id for miner_id in stats_dict if not miner_id.startswith("__")]
+        rows = [stats_dict[miner_id] for miner_id in ids]
+
+        numeric = {name: np.full(len(ids), np.nan) for name in NUMERIC_FIELDS}
+        offline = np.zeros(len(ids), dtype=bool)
+        for i, data in enumerate(rows):
+            for name in ("ping", "last_active_timestamp", "eth_balance", "staked", "staked_timestamp"):
+                numeric[name][i] = _number(data.get(name))
+            for metric in METRICS:
+                m = data.get(metric) if isinstance(data.get(metric), dict) else {}
+                point = numeric[f"{metric}_point"][i] = _number(m.get("point", 0))
+                counter = numeric[f"{metric}_counter"][i] = _number(m.get("counter", 1))
+                # Snapshots written before ratios were carried still sort correctly
+                numeric[f"{metric}_ratio"][i] = _number(m.get("ratio", point / counter if counter else 0.0))
+            offline[i] = bool(data.get("is_offline", False))
+
+        same_rows = ids == self.miner_ids
+        if not same_rows:
+            self.beginResetModel()
+        self.miner_ids = ids
+        self.numeric = numeric
+        self.offline = offline
+        self.sort_keys = self._build_sort_keys()
+        if same_rows:
+            if ids:
+                self.dataChanged.emit(self.index(0, 0), self.index(len(ids) - 1, len(HEADERS) - 1))
+        else:
+            self.endResetModel()
+
+    def refresh_relative_times(self):
+        # Repaint only the "time ago" cells; the underlying timestamps are unchanged
+        last = len(self.miner_ids) - 1
+        if last < 0:
+            return
+        for col in (COL_LAST_ACTIVE, COL_STAKED_AGO):
+            self.dataChanged.emit(self.index(0, col), self.index(last, col), [Qt.DisplayRole])
+
+    def _build_sort_keys(self):
+        def finite(values):
+            # Missing values sort after everything else
+            return np.where(np.isnan(values), np.inf, values)
+
+        # "Time ago" columns sort on the negated timestamp, so ascending means most recent first
+        keys = {
+            COL_PING: finite(self.numeric["ping"]),
+            COL_LAST_ACTIVE: finite(-self.numeric["last_active_timestamp"]),
+            COL_ETH: finite(self.numeric["eth_balance"]),
+            COL_STAKED: finite(self.numeric["staked"]),
+            COL_STAKED_AGO: finite(-self.numeric["staked_timestamp"])
+        }
+        for col, metric in METRIC_COLUMNS.items():
+            keys[col] = finite(self.numeric[f"{metric}_ratio"])
+        return keys
+
+    @staticmethod
+    def _format_time_ago(timestamp, missing):
+        # Formatted at paint time against the current clock
+        if math.isnan(timestamp):
+            return missing
+        return time_ago(timestamp, time.time())
+
+    def _brush(self, color):
+        brush = self._brushes.get(color)
+        if brush is None:
+            brush = self._brushes[color] = QBrush(QColor(color))
+        return brush
+
+    @staticmethod
+    def _format_number(value):
+        if math.isnan(value):
+            return "N/A"
+        return str(int(value)) if value.is_integer() else str(value)
+
+    def _display(self, row, col):
+        if col == COL_MINER:
+            miner_id = self.miner_ids[row]
+            return miner_id[:5] + "..." + miner_id[-5:] if len(miner_id) > 10 else miner_id
+        if col == COL_PING:
+            ping = self.numeric["ping"][row]
+            return "0" if math.isnan(ping) else self._format_number(ping)
+        if col in METRIC_COLUMNS:
+            metric = METRIC_COLUMNS[col]
+            point = self.numeric[f"{metric}_point"][row]
+            counter = self.numeric[f"{metric}_counter"][row]
+            percent = (point / counter * 100) if counter else 0
+            return f"{self._format_number(point)}/{self._format_number(counter)} ({percent:.2f}%)"
+        if col == COL_LAST_ACTIVE:
+            return self._format_time_ago(self.numeric["last_active_timestamp"][row], "Unknown")
+        if col == COL_ETH:
+            return self._format_number(self.numeric["eth_balance"][row])
+        if col == COL_STAKED:
+            return self._format_number(self.numeric["staked"][row])
+        if col == COL_STAKED_AGO:
+            return self._format_time_ago(self.numeric["staked_timestamp"][row], "N/A")
+        return ""
+
+    def _background(self, row, col):
+        if self.offline[row]:
+            return self._brush("#ff9999")
+        if col == COL_ETH:
+            balance = self.numeric["eth_balance"][row]
+            if math.isnan(balance):
+                return None
+            if balance < self.thresholds["eth_low"]:
+                return self._brush("#ffcccc")
+            if balance < self.thresholds["eth_mid"]:
+                return self._brush("#fff2cc")
+            return self._brush("#ccffcc")
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        row, col = index.row(), index.column()
+
+        if role == Qt.DisplayRole:
+            return self._display(row, col)
+        if role == SORT_ROLE:
+            if col == COL_MINER:
+                return self.miner_ids[row]
+            if col in self.sort_keys:
+                return float(self.sort_keys[col][row])
+            return self._display(row, col)
+        if role == Qt.ToolTipRole and col == COL_MINER:
+            return self.miner_ids[row]
+        if role == Qt.TextAlignmentRole and col in (COL_ETH, COL_STAKED):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.BackgroundRole:
+            brush = self._background(row, col)
+            return brush if brush is not None else QVariant()
+        return QVariant()
+
+
+class MinerSortProxyModel(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self.setDynamicSortFilter(True)
+        # Filter text matches against the full miner address, not the truncated display
+        self.setFilterKeyColumn(COL_MINER)
+        self.setFilterRole(Qt.ToolTipRole)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
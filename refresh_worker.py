@@ -0,0 +1,55 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class RefreshWorker(QThread):
+    data_ready = pyqtSignal(list, list)
+    # Emitted from the balance tracker thread; delivered on the GUI thread
+    balances_updated = pyqtSignal(dict)
+
+    def __init__(self, data_fetcher, parent=None):
+        super().__init__(parent)
+        self.data_fetcher = data_fetcher
+        self._pending = False
+        self.finished.connect(self._on_finished)
+
+    def request_refresh(self):
+        # Overlapping requests are merged into a single follow-up run
+        if self.isRunning():
+            self._pending = True
+            return False
+        self.start()
+        return True
+
+    def cancel_pending(self):
+        self._pending = False
+
+    def run(self):
+        try:
+            stats, alerts = self.data_fetcher.fetch_data()
+        except Exception as e:
+            print(f"Background refresh failed: {e}")
+            stats, alerts = [], []
+        self.data_ready.emit(stats, alerts)
+
+    def _on_finished(self):
+        if self._pending:
+            self._pending = False
+            self.wait()
+            self.start()
+
+
+class BackgroundTask(QThread):
+    # Runs a blocking callable off the GUI thread; result is None if it raised
+    result_ready = pyqtSignal(object)
+
+    def __init__(self, func, parent=None):
+        super().__init__(parent)
+        self.func = func
+
+    def run(self):
+        try:
+            result = self.func()
+        except Exception as e:
+            print(f"Background task failed: {e}")
+            result = None
+        self.result_ready.emit(result)
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+import transport
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class RpcError(Exception):
+    pass
+
+
+def encode_address_call(selector, address):
+    return selector + address.lower().replace("0x", "").rjust(64, "0")
+
+
+def fill_results(results, indexes, values):
+    # Writes values into results at indexes and returns the indexes still missing
+    for idx, value in zip(indexes, values):
+        results[idx] = value
+    return [idx for idx in indexes if results[idx] is None]
+
+
+def decode_uint256_words(result):
+    data = result[2:] if result.startswith("0x") else result
+    return [int(data[i:i + 64], 16) for i in range(0, len(data), 64)]
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Take a token now and return how long to wait until it is actually available
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class RpcClient:
+    def __init__(self, url, session=None, batch_size=50, timeout=20, rate_limit=None):
+        self.url = url
+        self.session = session or transport.get_session(url)
+        self.batch_size = max(1, int(batch_size))
+        self.timeout = timeout
+        self.limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.call_count = 0
+        self._count_lock = threading.Lock()
+
+    def _record_call(self):
+        with self._count_lock:
+            self.call_count += 1
+
+    def reset_call_count(self):
+        with self._count_lock:
+            self.call_count = 0
+
+    def _post(self, payload):
+        if self.limiter:
+            self.limiter.acquire()
+        self._record_call()
+        resp = self.session.post(self.url, json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def call(self, method, params):
+        data = self._post({"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+        if "error" in data:
+            raise RpcError(f"{method} failed: {data['error']}")
+        return data.get("result")
+
+    def _chunks(self, calls):
+        return [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+
+    @staticmethod
+    def _batch_payload(chunk):
+        return [
+            {"jsonrpc": "2.0", "id": idx, "method": method, "params": params}
+            for idx, (method, params) in enumerate(chunk)
+        ]
+
+    @staticmethod
+    def _parse_batch(chunk, data):
+        # Endpoints without batch support answer with a single error object
+        if not isinstance(data, list):
+            raise RpcError(data.get("error", "batch requests not supported"))
+
+        by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+        results = []
+        retry = []
+        for idx in range(len(chunk)):
+            item = by_id.get(idx)
+            if item is None or "error" in item:
+                retry.append(idx)
+                results.append(None)
+            else:
+                results.append(item.get("result"))
+        return results, retry
+
+    def batch(self, calls):
+        # calls is a list of (method, params); failed entries come back as None
+        results = []
+        for chunk in self._chunks(calls):
+            try:
+                results.extend(self._send_batch(chunk))
+            except Exception as e:
+                print(f"Batch request to {self.url} failed ({e}), falling back to single calls")
+                results.extend(self._call_each(chunk))
+        return results
+
+    def _send_batch(self, chunk):
+        results, retry = self._parse_batch(chunk, self._post(self._batch_payload(chunk)))
+        # Entries dropped or rejected inside a batch (e.g. rate limits) are retried one by one
+        fill_results(results, retry, self._call_each([chunk[idx] for idx in retry]))
+        return results
+
+    def _call_each(self, chunk):
+        results = []
+        for method, params in chunk:
+            try:
+                results.append(self.call(method, params))
+            except Exception as e:
+                print(f"RPC {method} to {self.url} failed: {e}")
+                results.append(None)
+        return results
+
+    # ----- asyncio variants, used by the async collector mode -----
+    async def _post_async(self, http, payload):
+        if self.limiter:
+            await self.limiter.acquire_async()
+        self._record_call()
+        async with http.post(self.url, json=payload, timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def call_async(self, http, method, params):
+        data = await self._post_async(http, {"jsonrpc": "2.0", "id": 1, "method": method, "params": params})
+        if "error" in data:
+            raise RpcError(f"{method} failed: {data['error']}")
+        return data.get("result")
+
+    async def batch_async(self, http, calls, semaphore):
+        async def run_chunk(chunk):
+            async with semaphore:
+                try:
+                    return await self._send_batch_async(http, chunk)
+                except Exception as e:
+                    print(f"Batch request to {self.url} failed ({e}), falling back to single calls")
+                    return await self._call_each_async(http, chunk)
+
+        parts = await asyncio.gather(*(run_chunk(chunk) for chunk in self._chunks(calls)))
+        return [result for part in parts for result in part]
+
+    async def _send_batch_async(self, http, chunk):
+        data = await self._post_async(http, self._batch_payload(chunk))
+        results, retry = self._parse_batch(chunk, data)
+        fill_results(results, retry, await self._call_each_async(http, [chunk[idx] for idx in retry]))
+        return results
+
+    async def _call_each_async(self, http, chunk):
+        results = []
+        for method, params in chunk:
+            try:
+                results.append(await self.call_async(http, method, params))
+            except Exception as e:
+                print(f"RPC {method} to {self.url} failed: {e}")
+                results.append(None)
+        return results
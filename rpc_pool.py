@@ -0,0 +1,267 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from rpc_client import RpcClient, RpcError, fill_results
+import transport
+
+# Seconds a failing endpoint is skipped for, doubled per consecutive failure
+MIN_COOLDOWN = 2.0
+MAX_COOLDOWN = 120.0
+
+
+class EndpointHealth:
+    def __init__(self, alpha=0.3, failure_latency=20.0):
+        self.alpha = alpha
+        # Latency charged for a failed request, so endpoints that only fail rank last
+        self.failure_latency = float(failure_latency)
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.down_until = 0.0
+        self._lock = threading.Lock()
+
+    def _add_latency(self, elapsed):
+        self.latency = elapsed if self.latency is None else \
+            (1 - self.alpha) * self.latency + self.alpha * elapsed
+
+    def record(self, elapsed, ok):
+        with self._lock:
+            if ok:
+                self._add_latency(elapsed)
+                self.error_rate *= 1 - self.alpha
+                self.failures = 0
+                self.down_until = 0.0
+            else:
+                self._add_latency(max(elapsed, self.failure_latency))
+                self.error_rate = (1 - self.alpha) * self.error_rate + self.alpha
+                self.failures += 1
+                self.down_until = time.monotonic() + min(MAX_COOLDOWN, MIN_COOLDOWN * 2 ** (self.failures - 1))
+
+    def note_slow(self, elapsed):
+        # A request still outstanding after elapsed seconds is at least that slow
+        with self._lock:
+            if self.latency is None or self.latency < elapsed:
+                self._add_latency(elapsed)
+
+    def score(self, now=None):
+        # Lower is better; only endpoints never tried score 0, so they get sampled once
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            score = (self.latency or 0.0) * (1 + 4 * self.error_rate)
+            if now < self.down_until:
+                score += 1000.0
+            return score
+
+
+class RpcPool:
+    # Same interface as RpcClient, spread over several endpoints for one chain
+    def __init__(self, urls, batch_size=50, timeout=20, rate_limits=None, default_rate=None, hedge_after=2.0):
+        if not urls:
+            raise ValueError("RpcPool needs at least one endpoint")
+        rate_limits = rate_limits or {}
+        # Sessions that only retry connection failures: a 429, 5xx or timeout has to
+        # reach the pool so it can fail over and score the endpoint, not stall in urllib3
+        self.clients = [
+            RpcClient(url, transport.get_session(url, idempotent=False), batch_size, timeout,
+                      rate_limit=rate_limits.get(url, default_rate))
+            for url in urls
+        ]
+        self.health = {client.url: EndpointHealth(failure_latency=timeout) for client in self.clients}
+        self.hedge_after = float(hedge_after) if hedge_after else None
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(self.clients), thread_name_prefix="rpc-pool")
+
+    @property
+    def url(self):
+        return self.ranked()[0].url
+
+    @property
+    def call_count(self):
+        return sum(client.call_count for client in self.clients)
+
+    def reset_call_count(self):
+        for client in self.clients:
+            client.reset_call_count()
+
+    def ranked(self):
+        # Healthiest first; ties keep the configured order
+        now = time.monotonic()
+        return sorted(self.clients, key=lambda client: self.health[client.url].score(now))
+
+    def status(self):
+        return {
+            url: {"latency": h.latency, "error_rate": round(h.error_rate, 3), "failures": h.failures}
+            for url, h in self.health.items()
+        }
+
+    def _timed(self, client, func, *args):
+        started = time.monotonic()
+        try:
+            result = func(*args)
+        except Exception:
+            self.health[client.url].record(time.monotonic() - started, False)
+            raise
+        ok = not isinstance(result, list) or any(value is not None for value in result)
+        self.health[client.url].record(time.monotonic() - started, ok)
+        return result
+
+    def call(self, method, params):
+        last_error = None
+        for client in self.ranked():
+            try:
+                return self._timed(client, client.call, method, params)
+            except Exception as e:
+                print(f"RPC {method} to {client.url} failed ({e}), trying next endpoint")
+                last_error = e
+        raise RpcError(f"{method} failed on all endpoints: {last_error}")
+
+    def batch(self, calls):
+        results = []
+        for chunk in self.clients[0]._chunks(calls):
+            results.extend(self._batch_chunk(chunk))
+        return results
+
+    def _send(self, client, chunk):
+        return self._timed(client, client._send_batch, chunk)
+
+    def _rounds(self, chunk):
+        # Failover plan for one chunk, shared by the sync and async drivers. Yields
+        # (client, hedge, calls, batched) requests and is sent back (values, used), or
+        # (None, error) when the request failed; returns the merged results
+        candidates = self.ranked()
+        results = [None] * len(chunk)
+        pending = list(range(len(chunk)))
+        batch_failed = False
+        # Each round sends what is still missing to the next endpoint(s)
+        while pending and candidates:
+            primary = candidates.pop(0)
+            hedge = candidates[0] if candidates and self.hedge_after is not None else None
+            values, used = yield primary, hedge, [chunk[idx] for idx in pending], True
+            if values is None:
+                print(f"Batch request to {primary.url} failed ({used}), failing over")
+                batch_failed = True
+                continue
+            if used is hedge:
+                candidates.pop(0)
+            pending = fill_results(results, pending, values)
+
+        if pending and batch_failed:
+            # Endpoints without batch support still answer single calls
+            values, _ = yield self.ranked()[0], None, [chunk[idx] for idx in pending], False
+            fill_results(results, pending, values)
+        return results
+
+    def _batch_chunk(self, chunk):
+        rounds = self._rounds(chunk)
+        reply = None
+        try:
+            while True:
+                client, hedge, calls, batched = rounds.send(reply)
+                if not batched:
+                    reply = self._timed(client, client._call_each, calls), client
+                    continue
+                try:
+                    reply = self._hedged(client, hedge, calls)
+                except Exception as e:
+                    reply = None, e
+        except StopIteration as done:
+            return done.value
+
+    def _hedged(self, primary, hedge, chunk):
+        # Send to the healthiest endpoint; if it has not answered within hedge_after,
+        # race the same read against the runner-up and take whichever succeeds first
+        first = self._executor.submit(self._send, primary, chunk)
+        if hedge is None:
+            return first.result(), primary
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result(), primary
+        self.health[primary.url].note_slow(self.hedge_after)
+
+        second = self._executor.submit(self._send, hedge, chunk)
+        owners = {first: primary, second: hedge}
+        remaining = set(owners)
+        error = None
+        while remaining:
+            done, remaining = wait(remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result(), owners[future]
+                except Exception as e:
+                    error = e
+        raise error
+
+    # ----- asyncio variants, used by the async collector mode -----
+    async def _timed_async(self, client, coro):
+        started = time.monotonic()
+        try:
+            result = await coro
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.health[client.url].record(time.monotonic() - started, False)
+            raise
+        ok = not isinstance(result, list) or any(value is not None for value in result)
+        self.health[client.url].record(time.monotonic() - started, ok)
+        return result
+
+    async def call_async(self, http, method, params):
+        last_error = None
+        for client in self.ranked():
+            try:
+                return await self._timed_async(client, client.call_async(http, method, params))
+            except Exception as e:
+                print(f"RPC {method} to {client.url} failed ({e}), trying next endpoint")
+                last_error = e
+        raise RpcError(f"{method} failed on all endpoints: {last_error}")
+
+    async def batch_async(self, http, calls, semaphore):
+        async def run_chunk(chunk):
+            async with semaphore:
+                return await self._batch_chunk_async(http, chunk)
+
+        parts = await asyncio.gather(*(run_chunk(chunk) for chunk in self.clients[0]._chunks(calls)))
+        return [result for part in parts for result in part]
+
+    async def _batch_chunk_async(self, http, chunk):
+        rounds = self._rounds(chunk)
+        reply = None
+        try:
+            while True:
+                client, hedge, calls, batched = rounds.send(reply)
+                if not batched:
+                    reply = await self._timed_async(client, client._call_each_async(http, calls)), client
+                    continue
+                try:
+                    reply = await self._hedged_async(http, client, hedge, calls)
+                except Exception as e:
+                    reply = None, e
+        except StopIteration as done:
+            return done.value
+
+    async def _hedged_async(self, http, primary, hedge, chunk):
+        first = asyncio.ensure_future(self._timed_async(primary, primary._send_batch_async(http, chunk)))
+        if hedge is None:
+            return await first, primary
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+        if done:
+            return first.result(), primary
+        self.health[primary.url].note_slow(self.hedge_after)
+
+        second = asyncio.ensure_future(self._timed_async(hedge, hedge._send_batch_async(http, chunk)))
+        owners = {first: primary, second: hedge}
+        remaining = set(owners)
+        error = None
+        try:
+            while remaining:
+                done, remaining = await asyncio.wait(remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        return task.result(), owners[task]
+                    except Exception as e:
+                        error = e
+            raise error
+        finally:
+            # The slower request is no longer needed
+            for task in remaining:
+                task.cancel()
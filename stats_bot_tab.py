@@ -4,36 +4,37 @@ from PyQt5.QtWidgets import (
     QSpinBox, QPushButton, QHBoxLayout, QGroupBox, QMessageBox
 )
 from PyQt5.QtCore import QTimer, Qt
-import json
 import time
 import threading
 import logging
-import os
 from alert_manager import AlertManager
+from history_store import HistoryStore
+from refresh_worker import BackgroundTask
+from stats_report import STATS_KEYS, METRIC_ABBREVIATIONS, prepare_stats_report
 
 
 class StatsBotTab(QWidget):
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, stats_provider=None):
         super().__init__()
         self.config_manager = config_manager
+        # Returns the latest collected stats (DataFetcher.cached_stats)
+        self.stats_provider = stats_provider
         self.alert_manager = AlertManager(self.config_manager)
+        self.history = HistoryStore()
+        # The one-off bot_stats.json migration can be large; keep it off the GUI thread
+        threading.Thread(target=self.history.import_legacy_json, daemon=True).start()
 
-        self.stats_keys = [
-            "ping", "precommit", "commit", "prepare", "create", "eth_balance"
-        ]
-
-        self.metric_abbreviations = {
-            "precommit": "PC",
-            "commit": "CO",
-            "prepare": "PP",
-            "create": "CR",
-            "eth_balance": "eth",
-            "ping": "ping"
-        }
+        self.stats_keys = list(STATS_KEYS)
+        self.metric_abbreviations = dict(METRIC_ABBREVIATIONS)
 
         self.timer = QTimer()
         self.timer.timeout.connect(self.send_stats_to_telegram)
 
+        self.retention_task = None
+        self.retention_timer = QTimer()
+        self.retention_timer.timeout.connect(self.apply_history_retention)
+        self.retention_timer.start(15 * 60 * 1000)
+
         self.init_ui()
         self.restore_settings()
 
@@ -129,7 +130,6 @@ class StatsBotTab(QWidget):
             "compare_over_time": self.compare_checkbox.isChecked()
         }
         self.config_manager.set("stats_bot", settings)
-        self.config_manager.save_config()
         self.show_message("Stats Bot", "Settings saved.")
         if settings["enabled"]:
             self.start_timer()
@@ -143,6 +143,27 @@ class StatsBotTab(QWidget):
         self.freq_input.setValue(settings.get("interval_hours", 1))
         self.enable_checkbox.setChecked(settings.get("enabled", False))
 
+    def apply_history_retention(self):
+        # Rollups and pruning can take a while on a large backlog; keep them off the GUI thread
+        if self.retention_task is not None and self.retention_task.isRunning():
+            return
+        settings = self.config_manager.get("history_retention", {})
+        self.retention_task = BackgroundTask(lambda: self.history.apply_retention(settings))
+        self.retention_task.result_ready.connect(self.on_history_retention_done)
+        self.retention_task.start()
+
+    def on_history_retention_done(self, rolled):
+        if rolled is None:
+            logging.error("History retention failed")
+        elif rolled:
+            logging.info(f"Rolled up and pruned {rolled} raw history samples")
+
+    def shutdown(self):
+        self.timer.stop()
+        self.retention_timer.stop()
+        if self.retention_task is not None:
+            self.retention_task.wait()
+
     def show_message(self, title, message, icon=QMessageBox.Information):
         QTimer.singleShot(0, lambda: QMessageBox(icon, title, message, parent=self).exec_())
 
@@ -154,79 +175,18 @@ class StatsBotTab(QWidget):
             self.show_message("Stats Bot", "No metrics selected.", QMessageBox.Warning)
             return
 
-        try:
-            with open("stats.json", "r") as f:
-                stats = json.load(f)
-        except Exception as e:
-            self.show_message("Stats Bot", "Failed to read stats.json.", QMessageBox.Critical)
+        stats = self.stats_provider() if self.stats_provider else {}
+        if not stats:
+            self.show_message("Stats Bot", "No stats collected yet.", QMessageBox.Warning)
             return
 
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        entry = {"timestamp": timestamp, "data": stats}
-        bot_stats = []
-
-        if os.path.exists("bot_stats.json"):
-            try:
-                with open("bot_stats.json", "r") as f:
-                    bot_stats = json.load(f)
-            except:
-                bot_stats = []
-
-        bot_stats.append(entry)
-        try:
-            with open("bot_stats.json", "w") as f:
-                json.dump(bot_stats, f, indent=2)
-        except:
-            pass
-
-        previous_data = bot_stats[-2]["data"] if compare_enabled and len(bot_stats) >= 2 else {}
-
-        lines = []
-
-        if self.include_timestamp_checkbox.isChecked():
-            lines.append(f"📅 {timestamp}")
-
-        for addr, data in stats.items():
-            if addr == "__rpc_meta__" or not isinstance(data, dict):
-                continue
-
-            line = []
-            if self.include_header_checkbox.isChecked():
-                line.append(f"...{addr[-5:]}:")
-
-            for key in selected_keys:
-                val = data.get(key, "N/A")
-                label = self.metric_abbreviations.get(key, key)
-
-                val_str = str(val)
-                delta_str = ""
-
-                if isinstance(val, dict):
-                    point = val.get("point", 0)
-                    counter = val.get("counter", 1)
-                    percent = round((point / counter) * 100, 1) if counter else 0.0
-                    val_str = f"{point}/{counter} ({percent}%)"
-
-                    if compare_enabled:
-                        prev_val = previous_data.get(addr, {}).get(key, {})
-                        prev_point = prev_val.get("point", 0)
-                        prev_counter = prev_val.get("counter", 1)
-                        prev_percent = round((prev_point / prev_counter) * 100, 1) if prev_counter else 0.0
-                        diff = round(percent - prev_percent, 1)
-                        delta_str = f" 🟢▲{diff}%" if diff > 0 else f" 🔴▼{abs(diff)}%" if diff < 0 else " ➖0.0%"
-
-                elif isinstance(val, (int, float)) and compare_enabled:
-                    prev_val = previous_data.get(addr, {}).get(key)
-                    if isinstance(prev_val, (int, float)):
-                        diff = round(val - prev_val, 1)
-                        delta_str = f" 🟢▲{diff}" if diff > 0 else f" 🔴▼{abs(diff)}" if diff < 0 else " ➖0.0"
-
-                line.append(f"{label}: {val_str}{delta_str}")
-
-            if line:
-                lines.append(" | ".join(line))
-
-        message = "\n\n".join(lines) if lines else "Stats Bot Test: No real data matched. Test message."
+        settings = {
+            "metrics": selected_keys,
+            "compare_over_time": compare_enabled,
+            "include_header": self.include_header_checkbox.isChecked(),
+            "include_timestamp": self.include_timestamp_checkbox.isChecked()
+        }
+        message = prepare_stats_report(self.history, stats, settings)
 
         def send():
             try:
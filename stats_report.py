@@ -0,0 +1,95 @@
+import logging
+import time
+
+STATS_KEYS = ["ping", "precommit", "commit", "prepare", "create", "eth_balance"]
+
+METRIC_ABBREVIATIONS = {
+    "precommit": "PC",
+    "commit": "CO",
+    "prepare": "PP",
+    "create": "CR",
+    "eth_balance": "eth",
+    "ping": "ping"
+}
+
+
+def build_stats_message(stats, selected_keys, previous_data=None, compare=False,
+                        include_header=True, include_timestamp=False, now=None):
+    now = now if now is not None else time.time()
+    previous_data = previous_data or {}
+    lines = []
+
+    if include_timestamp:
+        lines.append(f"📅 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}")
+
+    for addr, data in stats.items():
+        if addr == "__rpc_meta__" or not isinstance(data, dict):
+            continue
+
+        line = []
+        if include_header:
+            line.append(f"...{addr[-5:]}:")
+
+        for key in selected_keys:
+            val = data.get(key, "N/A")
+            label = METRIC_ABBREVIATIONS.get(key, key)
+
+            val_str = str(val)
+            delta_str = ""
+
+            if isinstance(val, dict):
+                point = val.get("point", 0)
+                counter = val.get("counter", 1)
+                percent = round((point / counter) * 100, 1) if counter else 0.0
+                val_str = f"{point}/{counter} ({percent}%)"
+
+                if compare:
+                    prev_val = previous_data.get(addr, {}).get(key, {})
+                    prev_point = prev_val.get("point", 0)
+                    prev_counter = prev_val.get("counter", 1)
+                    prev_percent = round((prev_point / prev_counter) * 100, 1) if prev_counter else 0.0
+                    diff = round(percent - prev_percent, 1)
+                    delta_str = f" 🟢▲{diff}%" if diff > 0 else f" 🔴▼{abs(diff)}%" if diff < 0 else " ➖0.0%"
+
+            elif isinstance(val, (int, float)) and compare:
+                prev_val = previous_data.get(addr, {}).get(key)
+                if isinstance(prev_val, (int, float)):
+                    diff = round(val - prev_val, 1)
+                    delta_str = f" 🟢▲{diff}" if diff > 0 else f" 🔴▼{abs(diff)}" if diff < 0 else " ➖0.0"
+
+            line.append(f"{label}: {val_str}{delta_str}")
+
+        if line:
+            lines.append(" | ".join(line))
+
+    return "\n\n".join(lines) if lines else "Stats Bot Test: No real data matched. Test message."
+
+
+def prepare_stats_report(history, stats, settings, now=None, compare_before=None):
+    # Records the snapshot in history and builds the message; shared by the GUI tab and the daemon.
+    # Deltas are taken against the latest sample before compare_before (default: now)
+    now = now if now is not None else time.time()
+    compare_before = compare_before if compare_before is not None else now
+    compare = settings.get("compare_over_time", False)
+    try:
+        history.record_snapshot(stats, now)
+    except Exception as e:
+        logging.error(f"Failed to record stats history: {e}")
+
+    previous_data = {}
+    if compare:
+        try:
+            previous_data = history.previous_snapshot(
+                [addr for addr in stats if not addr.startswith("__")], int(compare_before))
+        except Exception as e:
+            logging.error(f"Failed to read stats history: {e}")
+
+    return build_stats_message(
+        stats,
+        settings.get("metrics", []),
+        previous_data,
+        compare=compare,
+        include_header=settings.get("include_header", True),
+        include_timestamp=settings.get("include_timestamp", False),
+        now=now
+    )
@@ -0,0 +1,43 @@
+import os
+import sys
+import pytest
+
+# The app modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rpc_stub import RpcStub, MINER_A, MINER_B  # noqa: E402
+import corbot3  # noqa: E402
+
+
+@pytest.fixture
+def chains(tmp_path, monkeypatch):
+    # Caches such as token_metadata.json are written to the working directory
+    monkeypatch.chdir(tmp_path)
+    eth, token = RpcStub(chain_id=421614), RpcStub(chain_id=1)
+    for miner in (MINER_A, MINER_B):
+        eth.eth[miner] = 10 ** 18
+        token.tokens[miner] = 5 * 10 ** 18
+        token.stakes[miner] = (2 * 10 ** 18, 1700000000)
+    urls = {corbot3.ETH_CHAIN: [eth.start()], corbot3.TOKEN_CHAIN: [token.start()]}
+    yield eth, token, urls
+    eth.stop()
+    token.stop()
+
+
+@pytest.fixture
+def make_collector(chains):
+    eth, token, urls = chains
+
+    def make(**settings):
+        collector = corbot3.StatsCollector({
+            "rpc_endpoints": urls,
+            "rpc_requests_per_second": None,
+            "rpc_hedge_after": None,
+            **settings
+        })
+        # Prime chain id and decimals so the tests only see balance traffic
+        collector.token_decimals()
+        eth.reset_calls()
+        token.reset_calls()
+        return collector
+    return make
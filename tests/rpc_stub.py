@@ -0,0 +1,138 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from eth_abi import decode, encode
+from web3 import Web3
+from balance_cache import TRANSFER_TOPIC
+
+
+def selector(signature):
+    return Web3.keccak(text=signature)[:4].hex()
+
+
+BALANCE_OF = selector("balanceOf(address)")
+SHARES = selector("shares(address)")
+DECIMALS = selector("decimals()")
+AGGREGATE3 = selector("aggregate3((address,bool,bytes)[])")
+GET_ETH_BALANCE = selector("getEthBalance(address)")
+
+MINER_A = "0x1111111111111111111111111111111111111111"
+MINER_B = "0x2222222222222222222222222222222222222222"
+OUTSIDER = "0x3333333333333333333333333333333333333333"
+
+
+def address_word(address):
+    return "0x" + address.lower()[2:].rjust(64, "0")
+
+
+class RpcStub:
+    # Minimal JSON-RPC node for one chain: balances, token and stake reads, Multicall3,
+    # block number and logs. Every method it receives is recorded in calls.
+    def __init__(self, chain_id=1, block=100):
+        self.chain_id = chain_id
+        self.block = block
+        self.eth = {}
+        self.tokens = {}
+        self.stakes = {}
+        self.logs = []
+        self.calls = []
+        # Failure modes: answer every request with a JSON-RPC error, or with an HTTP error
+        self.fail = False
+        self.http_status = 200
+        self.http_headers = {}
+        self._server = None
+
+    def reset_calls(self):
+        self.calls.clear()
+
+    def count(self, method, selector=None):
+        return sum(1 for m, s in self.calls if m == method and (selector is None or s == selector))
+
+    def add_transfer(self, token, sender, receiver, value, block=None):
+        self.logs.append({
+            "address": token,
+            "blockNumber": hex(block if block is not None else self.block),
+            "topics": [
+                TRANSFER_TOPIC,
+                address_word(sender),
+                address_word(receiver)
+            ],
+            "data": "0x" + hex(value)[2:].rjust(64, "0")
+        })
+
+    def _eth_call(self, data):
+        sel, arg = data[:8], bytes.fromhex(data[8:])
+        if sel == DECIMALS:
+            return encode(["uint8"], [18])
+        if sel == BALANCE_OF:
+            return encode(["uint256"], [self.tokens.get(decode(["address"], arg)[0].lower(), 0)])
+        if sel == SHARES:
+            return encode(["uint256", "uint256"], list(self.stakes.get(decode(["address"], arg)[0].lower(), (0, 0))))
+        if sel == GET_ETH_BALANCE:
+            return encode(["uint256"], [self.eth.get(decode(["address"], arg)[0].lower(), 0)])
+        if sel == AGGREGATE3:
+            calls = decode(["(address,bool,bytes)[]"], arg)[0]
+            return encode(["(bool,bytes)[]"], [[(True, self._eth_call(d.hex())) for _, _, d in calls]])
+        raise ValueError(f"unknown selector {sel}")
+
+    def handle(self, request):
+        method, params = request["method"], request.get("params", [])
+        self.calls.append((method, params[0]["data"][2:10] if method == "eth_call" else None))
+        try:
+            if self.fail:
+                raise ValueError("endpoint unavailable")
+            if method == "eth_chainId":
+                result = hex(self.chain_id)
+            elif method == "eth_blockNumber":
+                result = hex(self.block)
+            elif method == "eth_getBalance":
+                result = hex(self.eth.get(params[0].lower(), 0))
+            elif method == "eth_call":
+                result = "0x" + self._eth_call(params[0]["data"][2:]).hex()
+            elif method == "eth_getLogs":
+                query = params[0]
+                low, high = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+                addresses = {a.lower() for a in query.get("address", [])}
+                result = [
+                    log for log in self.logs
+                    if low <= int(log["blockNumber"], 16) <= high and log["address"].lower() in addresses
+                ]
+            else:
+                return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32601, "message": "method not found"}}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if stub.http_status != 200:
+                    stub.calls.append(("http_error", None))
+                    self.send_response(stub.http_status)
+                    for name, value in stub.http_headers.items():
+                        self.send_header(name, value)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                reply = [stub.handle(r) for r in body] if isinstance(body, list) else stub.handle(body)
+                raw = json.dumps(reply).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,91 @@
+from balance_cache import TRANSFER_TOPIC, BalanceCache, affected_addresses
+from corbot3 import CORTENSOR_TOKEN_ADDRESS, STAKING_CONTRACT_ADDRESS, TOKEN_CHAIN
+from rpc_stub import BALANCE_OF, SHARES, MINER_A, MINER_B, OUTSIDER, address_word
+
+
+def test_same_block_reuses_every_balance(chains, make_collector):
+    eth, token, _ = chains
+    collector = make_collector()
+    first = collector.fetch_balances([MINER_A, MINER_B])
+    assert eth.count("eth_getBalance") == 2
+    assert token.count("eth_call") == 4
+
+    eth.reset_calls()
+    token.reset_calls()
+    assert collector.fetch_balances([MINER_A, MINER_B]) == first
+    assert eth.count("eth_getBalance") == 0
+    assert token.count("eth_call") == 0
+    # Nothing to scan when the token block did not move
+    assert token.count("eth_getLogs") == 0
+
+
+def test_new_block_without_logs_keeps_token_entries(chains, make_collector):
+    eth, token, _ = chains
+    collector = make_collector()
+    collector.fetch_balances([MINER_A, MINER_B])
+
+    eth.block += 1
+    token.block += 5
+    eth.reset_calls()
+    token.reset_calls()
+    collector.fetch_balances([MINER_A, MINER_B])
+    assert token.count("eth_getLogs") == 1
+    assert token.count("eth_call") == 0
+    # ETH balances have no logs, so a new block always re-reads them
+    assert eth.count("eth_getBalance") == 2
+    assert collector.balance_cache.synced_block(TOKEN_CHAIN) == token.block
+
+
+def test_transfer_log_invalidates_only_the_parties(chains, make_collector):
+    eth, token, _ = chains
+    collector = make_collector()
+    collector.fetch_balances([MINER_A, MINER_B])
+
+    token.block += 3
+    token.tokens[MINER_A] = 7 * 10 ** 18
+    token.add_transfer(CORTENSOR_TOKEN_ADDRESS, OUTSIDER, MINER_A, 2 * 10 ** 18)
+    token.reset_calls()
+    balances = collector.fetch_balances([MINER_A, MINER_B])
+
+    assert token.count("eth_call", BALANCE_OF) == 1
+    assert token.count("eth_call", SHARES) == 0
+    assert balances[MINER_A]["cortensor"] == 7.0
+    assert balances[MINER_B]["cortensor"] == 5.0
+
+
+def test_unreadable_log_range_drops_the_chain(chains, make_collector):
+    eth, token, _ = chains
+    collector = make_collector(max_log_block_range=10)
+    collector.fetch_balances([MINER_A, MINER_B])
+
+    token.block += 50
+    token.reset_calls()
+    collector.fetch_balances([MINER_A, MINER_B])
+    assert token.count("eth_getLogs") == 0
+    assert token.count("eth_call") == 4
+
+
+def test_affected_addresses_from_staking_transfer():
+    logs = [{
+        "address": CORTENSOR_TOKEN_ADDRESS,
+        "topics": [
+            TRANSFER_TOPIC,
+            address_word(MINER_A),
+            address_word(STAKING_CONTRACT_ADDRESS)
+        ],
+        "data": "0x" + "0" * 63 + "1"
+    }]
+    changed = affected_addresses(logs, CORTENSOR_TOKEN_ADDRESS, STAKING_CONTRACT_ADDRESS)
+    assert changed == {"token": {MINER_A}, "stake": {MINER_A}}
+
+
+def test_advance_carries_forward_untouched_entries():
+    cache = BalanceCache()
+    cache.advance("chain", 10)
+    cache.put("chain", "token", MINER_A, 10, "a")
+    cache.put("chain", "token", MINER_B, 10, "b")
+    cache.advance("chain", 12, {"token": {MINER_B}})
+    assert cache.get("chain", "token", MINER_A, 12) == "a"
+    assert cache.get("chain", "token", MINER_B, 12) is None
+    cache.advance("chain", 13, None)
+    assert cache.get("chain", "token", MINER_A, 13) is None
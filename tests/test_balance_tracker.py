@@ -0,0 +1,51 @@
+from corbot3 import BalanceTracker, CORTENSOR_TOKEN_ADDRESS, STAKING_CONTRACT_ADDRESS
+from rpc_stub import BALANCE_OF, SHARES, MINER_A, MINER_B, OUTSIDER
+
+
+def make_tracker(collector):
+    return BalanceTracker(collector, on_change=lambda changes: None, miners_loader=lambda: [MINER_A, MINER_B])
+
+
+def test_poll_without_new_blocks_reads_nothing(chains, make_collector):
+    _, token, _ = chains
+    collector = make_collector()
+    collector.fetch_balances([MINER_A, MINER_B])
+    token.reset_calls()
+
+    assert make_tracker(collector).poll() == {}
+    assert token.count("eth_getLogs") == 0
+    assert token.count("eth_call") == 0
+
+
+def test_poll_rereads_only_miners_touched_by_logs(chains, make_collector):
+    eth, token, _ = chains
+    collector = make_collector()
+    collector.fetch_balances([MINER_A, MINER_B])
+
+    token.block += 2
+    token.tokens[MINER_B] = 3 * 10 ** 18
+    token.add_transfer(CORTENSOR_TOKEN_ADDRESS, MINER_B, OUTSIDER, 2 * 10 ** 18)
+    token.reset_calls()
+    changes = make_tracker(collector).poll()
+
+    assert list(changes) == [MINER_B]
+    assert changes[MINER_B]["cortensor_balance"] == 3.0
+    assert changes[MINER_B]["staked"] == 2.0
+    # A plain transfer only re-reads the token balance of the miner it touched
+    assert token.count("eth_call", BALANCE_OF) == 1
+    assert token.count("eth_call", SHARES) == 0
+
+
+def test_poll_picks_up_stake_changes(chains, make_collector):
+    _, token, _ = chains
+    collector = make_collector()
+    collector.fetch_balances([MINER_A, MINER_B])
+
+    token.block += 1
+    token.stakes[MINER_A] = (4 * 10 ** 18, 1700000500)
+    token.add_transfer(CORTENSOR_TOKEN_ADDRESS, MINER_A, STAKING_CONTRACT_ADDRESS, 2 * 10 ** 18)
+    changes = make_tracker(collector).poll()
+
+    assert list(changes) == [MINER_A]
+    assert changes[MINER_A]["staked"] == 4.0
+    assert changes[MINER_A]["staked_timestamp"] == 1700000500
@@ -0,0 +1,48 @@
+from eth_abi import decode, encode
+from corbot3 import (
+    AGGREGATE3_SELECTOR, BALANCE_OF_SELECTOR, SHARES_SELECTOR, CORTENSOR_TOKEN_ADDRESS,
+    STAKING_CONTRACT_ADDRESS, decode_aggregate3, encode_aggregate3
+)
+from rpc_client import encode_address_call
+from rpc_stub import AGGREGATE3, MINER_A, MINER_B
+
+
+def test_encode_aggregate3_round_trip():
+    calls = [
+        (CORTENSOR_TOKEN_ADDRESS, encode_address_call(BALANCE_OF_SELECTOR, MINER_A)),
+        (STAKING_CONTRACT_ADDRESS, encode_address_call(SHARES_SELECTOR, MINER_B))
+    ]
+    data = encode_aggregate3(calls)
+    assert data.startswith(AGGREGATE3_SELECTOR)
+
+    decoded = decode(["(address,bool,bytes)[]"], bytes.fromhex(data[len(AGGREGATE3_SELECTOR):]))[0]
+    assert [(target.lower(), allow_failure, "0x" + call.hex()) for target, allow_failure, call in decoded] == [
+        (target.lower(), True, call) for target, call in calls
+    ]
+
+
+def test_decode_aggregate3_marks_failed_calls():
+    result = "0x" + encode(["(bool,bytes)[]"], [[
+        (True, encode(["uint256"], [42])),
+        (False, b""),
+        (True, encode(["uint256", "uint256"], [7, 9]))
+    ]]).hex()
+    assert decode_aggregate3(result) == [
+        "0x" + encode(["uint256"], [42]).hex(),
+        None,
+        "0x" + encode(["uint256", "uint256"], [7, 9]).hex()
+    ]
+
+
+def test_multicall_reads_match_batched_reads(chains, make_collector):
+    eth, token, _ = chains
+    batched = make_collector(use_balance_cache=False).fetch_balances([MINER_A, MINER_B])
+    eth.reset_calls()
+    token.reset_calls()
+
+    multicall = make_collector(use_balance_cache=False, use_multicall=True).fetch_balances([MINER_A, MINER_B])
+    assert multicall == batched
+    # One aggregate3 call per chain instead of one call per address
+    assert eth.count("eth_call", AGGREGATE3) == 1
+    assert token.count("eth_call", AGGREGATE3) == 1
+    assert eth.count("eth_getBalance") == 0
@@ -0,0 +1,50 @@
+import time
+import pytest
+from rpc_pool import EndpointHealth, RpcPool
+from rpc_stub import RpcStub
+
+
+@pytest.fixture
+def stubs():
+    started = [RpcStub(block=100), RpcStub(block=100)]
+    yield started, [stub.start() for stub in started]
+    for stub in started:
+        stub.stop()
+
+
+def test_failures_score_worse_than_a_healthy_endpoint():
+    healthy, failing, untried = EndpointHealth(), EndpointHealth(failure_latency=20), EndpointHealth()
+    healthy.record(0.2, True)
+    for _ in range(5):
+        failing.record(0.01, False)
+    failing.down_until = 0.0
+    assert untried.score() == 0.0
+    assert failing.score() > healthy.score() > 0.0
+
+
+def test_failed_endpoint_is_not_retried_first_after_cooldown(stubs):
+    (bad, good), (bad_url, good_url) = stubs
+    bad.fail = True
+    pool = RpcPool([bad_url, good_url], hedge_after=None)
+
+    for _ in range(3):
+        assert pool.call("eth_blockNumber", []) == hex(good.block)
+        # Let the cooldown lapse so only the score decides the order
+        pool.health[bad_url].down_until = 0.0
+
+    assert pool.ranked()[0].url == good_url
+    assert bad.count("eth_blockNumber") == 1
+    assert good.count("eth_blockNumber") == 3
+
+
+def test_rate_limited_endpoint_fails_over_without_waiting(stubs):
+    (limited, good), urls = stubs
+    limited.http_status = 429
+    limited.http_headers = {"Retry-After": "30"}
+    pool = RpcPool(urls, hedge_after=None)
+
+    started = time.monotonic()
+    assert pool.call("eth_blockNumber", []) == hex(good.block)
+    assert time.monotonic() - started < 5
+    assert limited.count("http_error") == 1
+    assert pool.health[urls[0]].failures == 1
@@ -0,0 +1,16 @@
+import time
+
+
+def time_ago(timestamp, now=None):
+    if not timestamp or timestamp == 0:
+        return "Unknown"
+    now = now if now is not None else time.time()
+    seconds = int(now - timestamp)
+    if seconds < 60:
+        return f"{seconds} sec ago"
+    elif seconds < 3600:
+        return f"{seconds // 60} min {seconds % 60} sec ago"
+    elif seconds < 86400:
+        return f"{seconds // 3600} hr {(seconds % 3600) // 60} min ago"
+    else:
+        return f"{seconds // 86400} days ago"
@@ -0,0 +1,69 @@
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_settings = {
+    "pool_size": 20,
+    "connect_timeout": 5,
+    "read_timeout": 30,
+    "retries": 3,
+    "backoff_factor": 0.5
+}
+_sessions = {}
+_lock = threading.Lock()
+
+
+class PooledSession(requests.Session):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def configure(settings):
+    # Only affects sessions created after the call
+    with _lock:
+        _settings.update({k: v for k, v in (settings or {}).items() if k in _settings})
+
+
+def pool_size():
+    return int(_settings["pool_size"])
+
+
+def _build_session(idempotent):
+    retries = int(_settings["retries"])
+    # Non-idempotent traffic (Telegram sends) is only retried when the connection was never
+    # made: a read timeout or a 5xx may come after the message was accepted, and 429s are
+    # paced by the Telegram outbox using retry_after
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries if idempotent else 0,
+        other=None if idempotent else 0,
+        status=retries if idempotent else 0,
+        backoff_factor=_settings["backoff_factor"],
+        status_forcelist=(429, 500, 502, 503, 504) if idempotent else (),
+        allowed_methods=None,
+        respect_retry_after_header=idempotent,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size(), pool_maxsize=pool_size(), max_retries=retry)
+    session = PooledSession((_settings["connect_timeout"], _settings["read_timeout"]))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(url, idempotent=True):
+    key = (urlparse(url).netloc, idempotent)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _build_session(idempotent)
+            _sessions[key] = session
+        return session
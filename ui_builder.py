@@ -1,10 +1,11 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QTableWidget, QLabel, QTabWidget, QLineEdit, 
+    QWidget, QVBoxLayout, QTableView, QLabel, QTabWidget, QLineEdit, 
     QPushButton, QHBoxLayout, QSpinBox, QHeaderView, QGroupBox, 
     QFormLayout, QCheckBox, QTextEdit
 )
 from PyQt5.QtGui import QMovie
 from stats_bot_tab import StatsBotTab  # <-- Add this import
+from alert_manager import DEFAULT_MINER_OFFLINE_MINUTES
 
 class UIBuilder:
     def __init__(self, config_manager):
@@ -14,7 +15,12 @@ class UIBuilder:
         tab = QWidget()
         layout = QVBoxLayout()
 
-        table = QTableWidget()
+        filter_input = QLineEdit()
+        filter_input.setPlaceholderText("Filter miners by address")
+        filter_input.setClearButtonEnabled(True)
+        layout.addWidget(filter_input)
+
+        table = QTableView()
         layout.addWidget(table)
 
         rpc_label = QLabel("RPC Calls: 0")
@@ -41,6 +47,7 @@ class UIBuilder:
         return {
             "tab": tab,
             "table": table,
+            "filter_input": filter_input,
             "rpc_label": rpc_label,
             "last_update_label": last_update_label,
             "next_update_label": next_update_label,
@@ -148,7 +155,7 @@ class UIBuilder:
         miner_offline_input = QSpinBox()
         miner_offline_input.setMinimum(1)
         miner_offline_input.setMaximum(60)
-        miner_offline_input.setValue(alert_settings.get("miner_offline_minutes", 10))
+        miner_offline_input.setValue(alert_settings.get("miner_offline_minutes", DEFAULT_MINER_OFFLINE_MINUTES))
         
         threshold_layout.addRow("Low Balance (ETH):", low_balance_input)
         threshold_layout.addRow("Critical Balance (ETH):", critical_balance_input)